@@ -4,44 +4,135 @@ LoRa Data Decryption Script
 Decrypts LoRaWAN payloads using your device keys
 """
 
-import base64
 import binascii
+import logging
+import struct
 import sys
 from Crypto.Cipher import AES
 
+# SIMD base64 codec when available, stdlib otherwise
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+# NumPy (and optionally Numba) are only needed for batch header parsing
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Without numba the batch kernel simply runs as plain Python"""
+        return lambda func: func
+
+log = logging.getLogger(__name__)
+
 # Your device keys (same as in RAK13100 firmware)
 # Change these to match your firmware keys
 DEV_EUI = "0102030405060708"
 APP_EUI = "1112131415161718"
 APP_KEY = "21222324252627282A2B2C2D2E2F3031"
+# DevAddr assigned at OTAA join (big endian hex); leave empty to accept any
+DEV_ADDR = ""
+# AppSKey derived at OTAA join (hex); leave empty to fall back to AppKey ECB
+APP_S_KEY = ""
+
+_KEY_BYTES = binascii.unhexlify(APP_KEY)
+if len(_KEY_BYTES) != 16:
+    raise ValueError(f"APP_KEY must be 32 hex characters (AES-128), got {len(APP_KEY)}")
+# ECB keeps no state between calls, so one keyed cipher serves every packet
+_CIPHER = AES.new(_KEY_BYTES, AES.MODE_ECB)
+# Session cipher for real LoRaWAN FRMPayload decryption, when the AppSKey is known
+_APP_S_CIPHER = AES.new(binascii.unhexlify(APP_S_KEY), AES.MODE_ECB) if APP_S_KEY else None
+# DevAddr is sent little endian at bytes 1..4 of the frame
+_EXPECTED_DEV_ADDR_BYTES = binascii.unhexlify(DEV_ADDR)[::-1] if DEV_ADDR else None
+
+# Decrypted sensor payload layout (big endian):
+# accel x/y/z | gyro x/y/z | mag x/y/z | ToF C, ToF D
+_SENSOR_STRUCT = struct.Struct(">hhh hhh hhh HH")
+
+# Fixed LoRaWAN header: MHDR | DevAddr (little endian) | FCtrl | FCnt (little endian)
+_HDR = struct.Struct("<BIBH")
+
+# V3 uplink without FOpts: MHDR | DevAddr | FCtrl | FCnt | FPort | 22-byte payload | MIC
+_V3_FRAME = struct.Struct("<B4sBHB22s4s")
+
+# LoRaWAN encryption block A_i: 0x01 | 4 x 0x00 | Dir | DevAddr | FCnt | 0x00 | i
+_A_BLOCK = struct.Struct("<B4xB4sIxB")
+
+# Batch header parsing: _parse_frames reads MHDR..FPort only, so just those
+# 9 bytes of each frame are staged (the frame length is passed separately)
+_BATCH_HEADER_LEN = 9
+if NUMPY_AVAILABLE:
+    _FRAME_DTYPE = np.dtype([('valid', '?'), ('mhdr', 'u1'), ('msg_type', 'u1'),
+                             ('dev_addr', 'u4'), ('fctrl', 'u1'), ('fcnt', 'u2'),
+                             ('fport', 'i2'), ('payload_start', 'u1'),
+                             ('payload_length', 'i2')])
+
+
+class _LazyHex:
+    """Defers bytes.hex() until a log record is actually formatted"""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return self.data.hex()
+
+
+def _decode_sensor_payload(buf, offset=0):
+    """
+    Decode the 22-byte sensor block starting at offset
+    Returns (ax, ay, az, gx, gy, gz, mx, my, mz, tof_c_mm, tof_d_mm), ToF None when out of range
+    """
+    (axi, ayi, azi, gxi, gyi, gzi, mxi, myi, mzi,
+     tof_c_raw, tof_d_raw) = _SENSOR_STRUCT.unpack_from(buf, offset)
+
+    # Accelerometer scaled by 1000, gyroscope and magnetometer by 10
+    return (axi / 1000.0, ayi / 1000.0, azi / 1000.0,
+            gxi / 10.0, gyi / 10.0, gzi / 10.0,
+            mxi / 10.0, myi / 10.0, mzi / 10.0,
+            tof_c_raw if tof_c_raw != 0xFFFF else None,
+            tof_d_raw if tof_d_raw != 0xFFFF else None)
+
+
+def _frm_payload_keystream(cipher, dev_addr_le, fcnt, length, direction=0):
+    """LoRaWAN CTR keystream: all A_i blocks encrypted in a single ECB call"""
+    blocks = b"".join(_A_BLOCK.pack(0x01, direction, dev_addr_le, fcnt, i)
+                      for i in range(1, (length + 15) // 16 + 1))
+    return cipher.encrypt(blocks)[:length]
 
 
 def parse_lorawan_packet(payload_b64):
     """
     Parse LoRaWAN packet structure to extract DevAddr and other fields
+    Accepts the Base64 payload or already decoded frame bytes
     Returns dict with packet info or None if invalid
     """
     try:
-        packet_bytes = base64.b64decode(payload_b64)
+        packet_bytes = payload_b64 if isinstance(payload_b64, bytes) else b64decode(payload_b64)
         if len(packet_bytes) < 12:  # Minimum LoRaWAN packet size
             return None
 
         # LoRaWAN packet structure:
         # MHDR (1) | DevAddr (4) | FCtrl (1) | FCnt (2) | FPort (1) | FRMPayload | MIC (4)
 
-        mhdr = packet_bytes[0]
+        # One precompiled unpack reads the whole fixed header
+        mhdr, dev_addr, fctrl, fcnt = _HDR.unpack_from(packet_bytes)
         msg_type = (mhdr >> 5) & 0x07
 
         # Check if this is a data message (unconfirmed/confirmed uplink)
         if msg_type not in [0x02, 0x04]:  # 010 = unconfirmed uplink, 100 = confirmed uplink
             return None
 
-        # Extract DevAddr (4 bytes, little endian)
-        dev_addr = packet_bytes[1:5]
-        dev_addr_hex = dev_addr[::-1].hex().upper()  # Reverse for big endian display
-
-        fctrl = packet_bytes[5]
-        fcnt = int.from_bytes(packet_bytes[6:8], 'little')
+        # DevAddr was read little endian, so formatting the integer gives big endian display
+        dev_addr_hex = f"{dev_addr:08X}"
 
         # Check if FPort exists
         fport = None
@@ -61,9 +152,62 @@ def parse_lorawan_packet(payload_b64):
             'payload_start': payload_start,
             'packet_bytes': packet_bytes
         }
-    except:
+    except (binascii.Error, ValueError):  # bad base64 padding or non-ASCII input
         return None
 
+@njit(cache=True)
+def _parse_frames(buf, lengths, valid, mhdr, msg_type, dev_addr, fctrl, fcnt,
+                  fport, payload_start, payload_length):
+    """Header parse kernel for parse_lorawan_batch, same rules as parse_lorawan_packet"""
+    for i in range(buf.shape[0]):
+        n = lengths[i]
+        mt = (buf[i, 0] >> 5) & 0x07
+        if n < 12 or (mt != 0x02 and mt != 0x04):
+            continue
+
+        valid[i] = True
+        mhdr[i] = buf[i, 0]
+        msg_type[i] = mt
+        # DevAddr and FCnt are little endian on the wire; widen before shifting
+        dev_addr[i] = (np.uint32(buf[i, 1]) | (np.uint32(buf[i, 2]) << 8)
+                       | (np.uint32(buf[i, 3]) << 16) | (np.uint32(buf[i, 4]) << 24))
+        fctrl[i] = buf[i, 5]
+        fcnt[i] = np.uint32(buf[i, 6]) | (np.uint32(buf[i, 7]) << 8)
+
+        start = 8
+        fport[i] = -1
+        if (buf[i, 5] & 0x0F) == 0 and n > 12:  # No FOpts, has FPort
+            fport[i] = buf[i, 8]
+            start = 9
+        payload_start[i] = start
+        payload_length[i] = n - start - 4
+
+
+def parse_lorawan_batch(payloads_b64):
+    """
+    Parse the headers of many Base64 LoRaWAN frames in one pass (requires numpy)
+    Returns a structured array, one record per payload; 'valid' is False where
+    parse_lorawan_packet would return None and 'fport' is -1 when absent
+    """
+    n = len(payloads_b64)
+    buf = np.zeros((n, _BATCH_HEADER_LEN), dtype=np.uint8)
+    lengths = np.zeros(n, dtype=np.int32)
+    for i, payload in enumerate(payloads_b64):
+        try:
+            frame = b64decode(payload)
+        except (binascii.Error, ValueError):
+            continue  # length 0 marks the record invalid
+        head = frame[:_BATCH_HEADER_LEN]
+        buf[i, :len(head)] = np.frombuffer(head, dtype=np.uint8)
+        lengths[i] = len(frame)
+
+    out = np.zeros(n, dtype=_FRAME_DTYPE)
+    _parse_frames(buf, lengths, out['valid'], out['mhdr'], out['msg_type'],
+                  out['dev_addr'], out['fctrl'], out['fcnt'], out['fport'],
+                  out['payload_start'], out['payload_length'])
+    return out
+
+
 def check_device_match(json_line):
     """
     Check if the LoRa packet matches our V3 device using specific filtering
@@ -79,39 +223,56 @@ def check_device_match(json_line):
         return False
 
     payload = json_line[start:end]
-
     try:
-        # Parse LoRaWAN packet structure
-        packet_info = parse_lorawan_packet(payload)
-        if not packet_info:
-            return False
+        packet_bytes = b64decode(payload)
+    except (binascii.Error, ValueError):
+        return False
 
-        current_dev_addr = packet_info['dev_addr']
-        fport = packet_info.get('fport')
-        packet_bytes = packet_info['packet_bytes']
-        payload_start = packet_info['payload_start']
+    # V3 frames have exactly one shape, so unpack it directly
+    if len(packet_bytes) == _V3_FRAME.size:
+        mhdr, dev_addr_le, fctrl, fcnt, fport, _, _ = _V3_FRAME.unpack(packet_bytes)
+        if mhdr >> 5 in (0x02, 0x04) and fctrl & 0x0F == 0:
+            current_dev_addr = dev_addr_le[::-1].hex().upper()
+            print(f"Found LoRaWAN packet: DevAddr={current_dev_addr}, FCnt={fcnt}, FPort={fport}")
+            if _EXPECTED_DEV_ADDR_BYTES is not None and dev_addr_le != _EXPECTED_DEV_ADDR_BYTES:
+                print(f"✗ Not V3 device: DevAddr {current_dev_addr} (expected {DEV_ADDR.upper()})")
+                return False
+            print(f"✓ MATCHED V3 device signature: 22-byte payload on port {fport}")
+            return True
 
-        print(f"Found LoRaWAN packet: DevAddr={current_dev_addr}, FCnt={packet_info['fcnt']}, FPort={fport}")
+    # Parse LoRaWAN packet structure
+    packet_info = parse_lorawan_packet(packet_bytes)
+    if not packet_info:
+        return False
 
-        # TEMPORARY: Filter for V3 device signature (PORT FILTER REMOVED)
-        # - Exactly 22 bytes payload (sensor data)
-        # - Any port (to identify actual port used)
-        if len(packet_bytes) >= payload_start + 4:
-            payload_length = len(packet_bytes) - payload_start - 4
+    current_dev_addr = packet_info['dev_addr']
+    fport = packet_info.get('fport')
+    packet_bytes = packet_info['packet_bytes']
+    payload_start = packet_info['payload_start']
 
-            if payload_length == 22:
-                print(f"✓ MATCHED V3 device signature: 22-byte payload on port {fport}")
-                return True
-            else:
-                print(f"✗ Not V3 device: {payload_length}B payload on port {fport} (expected 22B on any port)")
-                return False
+    print(f"Found LoRaWAN packet: DevAddr={current_dev_addr}, FCnt={packet_info['fcnt']}, FPort={fport}")
 
-        print(f"✗ Packet too short for V3 device")
+    # Known DevAddr: a fixed-offset compare rejects other devices outright
+    if (_EXPECTED_DEV_ADDR_BYTES is not None
+            and memoryview(packet_bytes)[1:5] != _EXPECTED_DEV_ADDR_BYTES):
+        print(f"✗ Not V3 device: DevAddr {current_dev_addr} (expected {DEV_ADDR.upper()})")
         return False
 
-    except Exception as e:
-        print(f"Error parsing packet: {e}")
-        return False
+    # TEMPORARY: Filter for V3 device signature (PORT FILTER REMOVED)
+    # - Exactly 22 bytes payload (sensor data)
+    # - Any port (to identify actual port used)
+    if len(packet_bytes) >= payload_start + 4:
+        payload_length = len(packet_bytes) - payload_start - 4
+
+        if payload_length == 22:
+            print(f"✓ MATCHED V3 device signature: 22-byte payload on port {fport}")
+            return True
+        else:
+            print(f"✗ Not V3 device: {payload_length}B payload on port {fport} (expected 22B on any port)")
+            return False
+
+    print(f"✗ Packet too short for V3 device")
+    return False
 
 
 def decrypt_payload(base64_data, device_matched=True):
@@ -147,81 +308,57 @@ def decrypt_payload(base64_data, device_matched=True):
             print("No encrypted payload found")
             return None
 
-        print(f"Encrypted payload ({len(encrypted_payload)} bytes): {encrypted_payload.hex()}")
+        log.debug("Encrypted payload (%d bytes): %s", len(encrypted_payload), _LazyHex(encrypted_payload))
 
-        # For now, try simple AES decryption as fallback
-        # Real LoRaWAN uses AES-CTR with specific key derivation
-        key_bytes = binascii.unhexlify(APP_KEY)
-        cipher = AES.new(key_bytes, AES.MODE_ECB)
-
-        # Pad data to 32 bytes to handle full 22-byte sensor payload
-        padded_data = encrypted_payload
-        if len(padded_data) % 16 != 0:
-            padding = 16 - (len(padded_data) % 16)
-            padded_data += b"\x00" * padding
-
-        # Decrypt full payload (up to 32 bytes to cover 22-byte sensor data)
-        if len(padded_data) >= 32:
-            decrypted = cipher.decrypt(padded_data[:32])
+        if _APP_S_CIPHER is not None:
+            # Real LoRaWAN: FRMPayload XOR the AES-CTR keystream of the AppSKey
+            keystream = _frm_payload_keystream(_APP_S_CIPHER, packet_bytes[1:5],
+                                               packet_info['fcnt'], len(encrypted_payload))
+            decrypted = (int.from_bytes(encrypted_payload, 'big')
+                         ^ int.from_bytes(keystream, 'big')).to_bytes(len(encrypted_payload), 'big')
         else:
-            decrypted = cipher.decrypt(padded_data)
-        print(f"Decrypted hex: {decrypted.hex()}")
+            # Without the AppSKey, try simple AES decryption as fallback
+            # Pad data to 32 bytes to handle full 22-byte sensor payload
+            padded_data = encrypted_payload
+            if len(padded_data) % 16 != 0:
+                padding = 16 - (len(padded_data) % 16)
+                padded_data += b"\x00" * padding
+
+            # Decrypt full payload (up to 32 bytes to cover 22-byte sensor data)
+            if len(padded_data) >= 32:
+                decrypted = _CIPHER.decrypt(padded_data[:32])
+            else:
+                decrypted = _CIPHER.decrypt(padded_data)
+        log.debug("Decrypted hex: %s", _LazyHex(decrypted))
 
         # Try to parse as sensor data (22 bytes expected from firmware)
-        if len(decrypted) >= 22:
-            print("\n=== Complete Sensor Data Analysis ===")
-            # Accelerometer (6 bytes, scaled by 1000)
-            ax = int.from_bytes(decrypted[0:2], 'big', signed=True) / 1000.0
-            ay = int.from_bytes(decrypted[2:4], 'big', signed=True) / 1000.0
-            az = int.from_bytes(decrypted[4:6], 'big', signed=True) / 1000.0
+        if len(decrypted) >= 16:
+            complete = len(decrypted) >= 22
+            # A truncated block is zero-padded so both cases share one decode
+            (ax, ay, az, gx, gy, gz, mx, my, mz,
+             tof_c_mm, tof_d_mm) = _decode_sensor_payload(decrypted.ljust(22, b"\x00"))
+
+            if complete:
+                print("\n=== Complete Sensor Data Analysis ===")
+            else:
+                print("\n=== Partial Sensor Data (16 bytes) ===")
             print(f"Accelerometer [g]: X={ax:.3f}, Y={ay:.3f}, Z={az:.3f}")
-
-            # Gyroscope (6 bytes, scaled by 10)
-            gx = int.from_bytes(decrypted[6:8], 'big', signed=True) / 10.0
-            gy = int.from_bytes(decrypted[8:10], 'big', signed=True) / 10.0
-            gz = int.from_bytes(decrypted[10:12], 'big', signed=True) / 10.0
             print(f"Gyroscope [dps]: X={gx:.1f}, Y={gy:.1f}, Z={gz:.1f}")
 
-            # Magnetometer (6 bytes, scaled by 10)
-            mx = int.from_bytes(decrypted[12:14], 'big', signed=True) / 10.0
-            my = int.from_bytes(decrypted[14:16], 'big', signed=True) / 10.0
-            mz = int.from_bytes(decrypted[16:18], 'big', signed=True) / 10.0
-            print(f"Magnetometer [µT]: X={mx:.1f}, Y={my:.1f}, Z={mz:.1f}")
-
-            # ToF sensors (4 bytes total)
-            tof_c_raw = int.from_bytes(decrypted[18:20], 'big')
-            tof_d_raw = int.from_bytes(decrypted[20:22], 'big')
-
-            tof_c_mm = tof_c_raw if tof_c_raw != 0xFFFF else None
-            tof_d_mm = tof_d_raw if tof_d_raw != 0xFFFF else None
-
-            tof_c_str = f"{tof_c_mm}mm" if tof_c_mm is not None else "Out of Range"
-            tof_d_str = f"{tof_d_mm}mm" if tof_d_mm is not None else "Out of Range"
-
-            print(f"ToF Distance C: {tof_c_str}")
-            print(f"ToF Distance D: {tof_d_str}")
-        elif len(decrypted) >= 16:
-            print("\n=== Partial Sensor Data (16 bytes) ===")
-            # Accelerometer (6 bytes, scaled by 1000)
-            ax = int.from_bytes(decrypted[0:2], 'big', signed=True) / 1000.0
-            ay = int.from_bytes(decrypted[2:4], 'big', signed=True) / 1000.0
-            az = int.from_bytes(decrypted[4:6], 'big', signed=True) / 1000.0
-            print(f"Accelerometer [g]: X={ax:.3f}, Y={ay:.3f}, Z={az:.3f}")
+            if complete:
+                print(f"Magnetometer [µT]: X={mx:.1f}, Y={my:.1f}, Z={mz:.1f}")
 
-            # Gyroscope (6 bytes, scaled by 10)
-            gx = int.from_bytes(decrypted[6:8], 'big', signed=True) / 10.0
-            gy = int.from_bytes(decrypted[8:10], 'big', signed=True) / 10.0
-            gz = int.from_bytes(decrypted[10:12], 'big', signed=True) / 10.0
-            print(f"Gyroscope [dps]: X={gx:.1f}, Y={gy:.1f}, Z={gz:.1f}")
+                tof_c_str = f"{tof_c_mm}mm" if tof_c_mm is not None else "Out of Range"
+                tof_d_str = f"{tof_d_mm}mm" if tof_d_mm is not None else "Out of Range"
 
-            # Partial magnetometer (4 bytes available)
-            mx = int.from_bytes(decrypted[12:14], 'big', signed=True) / 10.0
-            my = int.from_bytes(decrypted[14:16], 'big', signed=True) / 10.0
-            print(f"Magnetometer [µT]: X={mx:.1f}, Y={my:.1f} (Z and ToF data missing)")
+                print(f"ToF Distance C: {tof_c_str}")
+                print(f"ToF Distance D: {tof_d_str}")
+            else:
+                print(f"Magnetometer [µT]: X={mx:.1f}, Y={my:.1f} (Z and ToF data missing)")
 
         return decrypted
 
-    except Exception as e:
+    except ValueError as e:
         print(f"Decryption error: {e}")
         return None
 
@@ -242,8 +379,8 @@ def monitor_gateway_output():
     my_device_count = 0
 
     try:
-        while True:
-            line = input()
+        for line in sys.stdin:
+            line = line.rstrip('\n')
 
             # Look for JSON data lines
             if '"data":"' in line:
@@ -271,17 +408,49 @@ def monitor_gateway_output():
         print(f"\nMonitoring stopped.")
         print(f"Total packets seen: {packet_count}")
         print(f"My device packets: {my_device_count}")
-    except EOFError:
+    else:
         print("End of input.")
 
 
+def batch_scan(stream):
+    """
+    Scan a captured gateway log and list every uplink header in one batch
+    """
+    payloads = []
+    for line in stream:
+        start = line.find('"data":"') + 8
+        end = line.find('"', start)
+        if start > 7 and end > start:
+            payloads.append(line[start:end])
+
+    frames = parse_lorawan_batch(payloads)
+    uplinks = frames[frames['valid']]
+    for frame in uplinks:
+        fport = frame['fport'] if frame['fport'] >= 0 else None
+        v3 = " <- V3 signature" if frame['payload_length'] == 22 else ""
+        print(f"DevAddr={int(frame['dev_addr']):08X}, FCnt={frame['fcnt']}, "
+              f"FPort={fport}, Payload={frame['payload_length']}B{v3}")
+
+    print(f"Payloads seen: {len(payloads)}")
+    print(f"Uplink frames: {len(uplinks)}")
+    print(f"V3 signature matches: {int((uplinks['payload_length'] == 22).sum())}")
+
+
 def main():
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # Offline header scan: python3 decrypt_lora.py --batch < capture.log
+        if not NUMPY_AVAILABLE:
+            print("ERROR: numpy is required for batch mode")
+            return
+        batch_scan(sys.stdin)
+    elif len(sys.argv) > 1:
         # Command line usage: python3 decrypt_lora.py "base64data"
+        logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.DEBUG)
         payload = sys.argv[1]
         decrypt_payload(payload)
     else:
-        # Interactive monitoring mode
+        # Interactive monitoring mode; hex dumps stay off unless DEBUG is enabled
+        logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
         monitor_gateway_output()
 
 
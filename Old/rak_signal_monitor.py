@@ -6,11 +6,12 @@ Enhanced version based on proven decrypt_lora.py
 """
 
 import base64
-import binascii
+import bisect
 import sys
 import json
-import re
+import struct
 import time
+from binascii import a2b_base64 as _b64d  # what base64.b64decode calls, minus the wrapper
 from datetime import datetime
 
 try:
@@ -20,6 +21,27 @@ except ImportError:
     CRYPTO_AVAILABLE = False
     print("WARNING: pycryptodome not installed. Decryption features disabled.")
 
+# orjson parses gateway JSON and the config file faster when installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# NumPy (and optionally Numba) are only needed for batch filtering of captured logs
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Without numba the batch kernel simply runs as plain Python"""
+        return lambda func: func
+
 # Default device configuration - UPDATE THESE TO MATCH YOUR DEVICE
 DEFAULT_CONFIG = {
     "dev_eui": "0102030405060708",
@@ -28,26 +50,172 @@ DEFAULT_CONFIG = {
     "device_name": "RAK Device"
 }
 
+# Gateway JSON: locate the rxpk object, then decode it in place in a single pass
+_RXPK_PREFIX = '{"rxpk":'
+_DECODER = json.JSONDecoder()
+
+
+def _loads_at(line, start):
+    """Decode the JSON object starting at line[start]"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(line[start:])
+        except orjson.JSONDecodeError:
+            pass  # text after the object; raw_decode stops at its end
+    return _DECODER.raw_decode(line, start)[0]
+
+# LoRaWAN frame header (little endian): MHDR | DevAddr | FCtrl | FCnt
+_HDR = struct.Struct("<BIBH")
+
+# LoRaWAN encryption block A_i: 0x01 | 4 x 0x00 | Dir | DevAddr | FCnt | 0x00 | i
+_A_BLOCK = struct.Struct("<B4xB4sIxB")
+
+# Decrypted sensor payload layout (big endian):
+# accel x/y/z | gyro x/y/z | mag x/y/z | ToF C, ToF D
+_SENSOR_STRUCT = struct.Struct(">hhh hhh hhh HH")
+# First 16 bytes only (through mag y), for truncated payloads
+_PARTIAL_SENSOR_STRUCT = struct.Struct(">hhh hhh hh")
+
+# print_packet_summary output: radio header of a matched packet, then decrypt lines
+_MINE_TEMPLATE = (
+    "\n🎯 MY DEVICE PACKET #{count}\n"
+    "⏰ Time: {timestamp}\n"
+    "📶 RSSI: {rssi} dBm\n"
+    "📊 SNR: {lsnr} dB\n"
+    "📻 Freq: {frequency} MHz\n"
+    "📏 Size: {size} bytes\n"
+    "📡 Rate: {datarate}\n"
+    "🔍 Quality: {signal_quality} ({distance_estimate})\n"
+)
+_SEPARATOR = "-" * 50 + "\n"
+_OTHER_TEMPLATE = "[{timestamp}] #{count} Other device: RSSI={rssi}dBm, Freq={frequency}MHz\n"
+
+# Signal classification: a reading above the i-th cut gets label i + 1
+_RSSI_CUTS = (-120, -100, -80)
+_SNR_CUTS = (-10, 0, 5)
+_SIGNAL_LABELS = ("Poor", "Fair", "Good", "Excellent")
+_DISTANCE_CUTS = (-120, -100, -80, -50)
+_DISTANCE_LABELS = ("> 15km", "5km - 15km", "1km - 5km", "100m - 1km", "< 100m")
+
+# Base64-level prefilter for is_my_device, checked before anything is decoded:
+# a V3 frame (header + 22-byte payload + MIC, 34 or 35 bytes) always encodes to 48 chars,
+# and the first char carries the top 6 bits of MHDR, which fix the message type
+_V3_B64_LEN = len(base64.b64encode(bytes(9 + 22 + 4)))
+_UPLINK_B64_FIRST = frozenset(base64.b64encode(bytes([mhdr]))[:1].decode()
+                              for mhdr in range(256) if (mhdr >> 5) in (0x02, 0x04))
+
+# Batch mode: frames per kernel call, and header bytes staged per frame (MHDR..FCtrl)
+_BATCH_SIZE = 256
+_BATCH_HEADER_LEN = 8
+
+
+@njit(cache=True)
+def _match_frames(buf, lengths, whitelist, out):
+    """Batch filter kernel, same rules as is_my_device after its base64 prefilter"""
+    for i in range(buf.shape[0]):
+        n = lengths[i]
+        out[i] = False
+        if n < 12:
+            continue
+        msg_type = (buf[i, 0] >> 5) & 0x07
+        if msg_type != 0x02 and msg_type != 0x04:
+            continue
+        if whitelist.shape[0] > 0:
+            dev_addr = (np.uint32(buf[i, 1]) | (np.uint32(buf[i, 2]) << 8)
+                        | (np.uint32(buf[i, 3]) << 16) | (np.uint32(buf[i, 4]) << 24))
+            known = False
+            for j in range(whitelist.shape[0]):
+                if dev_addr == whitelist[j]:
+                    known = True
+                    break
+            if not known:
+                continue
+        payload_start = 9 if (buf[i, 5] & 0x0F) == 0 and n > 12 else 8
+        out[i] = n - payload_start - 4 == 22
+
+
+def _frm_payload_keystream(cipher, dev_addr_le, fcnt, length, direction=0):
+    """LoRaWAN CTR keystream: all A_i blocks encrypted in a single ECB call"""
+    blocks = b"".join(_A_BLOCK.pack(0x01, direction, dev_addr_le, fcnt, i)
+                      for i in range(1, (length + 15) // 16 + 1))
+    return cipher.encrypt(blocks)[:length]
+
+def _lorawan_header(packet_bytes):
+    """
+    Parse the header of an uplink frame
+    Returns (mhdr, msg_type, dev_addr_u32, fctrl, fcnt, fport, payload_start), None if short or not an uplink
+    """
+    if len(packet_bytes) < 12:  # Minimum LoRaWAN packet size
+        return None
+
+    # LoRaWAN packet structure:
+    # MHDR (1) | DevAddr (4) | FCtrl (1) | FCnt (2) | FPort (1) | FRMPayload | MIC (4)
+    mhdr, dev_addr, fctrl, fcnt = _HDR.unpack_from(packet_bytes)
+    msg_type = (mhdr >> 5) & 0x07
+
+    # Check if this is a data message (unconfirmed/confirmed uplink)
+    if msg_type != 0x02 and msg_type != 0x04:  # 010 = unconfirmed uplink, 100 = confirmed uplink
+        return None
+
+    # FPort only follows the header when there are no FOpts and the frame has a payload
+    if fctrl & 0x0F == 0 and len(packet_bytes) > 12:
+        return mhdr, msg_type, dev_addr, fctrl, fcnt, packet_bytes[8], 9
+    return mhdr, msg_type, dev_addr, fctrl, fcnt, None, 8
+
 class LoRaSignalMonitor:
     def __init__(self, config=None):
         self.config = config or DEFAULT_CONFIG
         self.packet_count = 0
         self.my_device_count = 0
         self.start_time = datetime.now()
+        # (epoch second, "HH:MM:SS") of the last formatted packet timestamp
+        self._ts_cache = (None, "")
+        # Per-device constants, parsed once instead of on every packet. A malformed
+        # value is reported here and then per packet, instead of aborting startup.
+        # Known DevAddrs for strict filtering: 'dev_addr' set via 'configure' and/or a
+        # 'dev_addrs' list (big endian hex), kept as integers for a hashed lookup
+        known = list(self.config.get('dev_addrs', ()))
+        if self.config.get('dev_addr'):
+            known.append(self.config['dev_addr'])
+        try:
+            self._known_dev_addrs = frozenset(int(dev_addr, 16) for dev_addr in known)
+        except (ValueError, TypeError):
+            print(f"ERROR: invalid dev_addr in configuration {known}; DevAddr filtering disabled")
+            self._known_dev_addrs = frozenset()
+        # Display form for the reject diagnostic, built once
+        self._expected_dev_addrs = ', '.join(f"{addr:08X}" for addr in sorted(self._known_dev_addrs))
+
+        self._key_error = None
+        self._cipher = None
+        self._app_s_cipher = None
+        try:
+            self._key_bytes = bytes.fromhex(self.config['app_key'])
+            # ECB keeps no state between calls, so one keyed cipher serves every packet
+            if CRYPTO_AVAILABLE:
+                self._cipher = AES.new(self._key_bytes, AES.MODE_ECB)
+                # With the session AppSKey, payloads are decrypted with real LoRaWAN AES-CTR
+                if self.config.get('app_s_key'):
+                    self._app_s_cipher = AES.new(bytes.fromhex(self.config['app_s_key']), AES.MODE_ECB)
+        except (ValueError, TypeError) as e:  # non-hex or non-string value, or a bad key length
+            self._key_error = f"Invalid app_key/app_s_key in configuration: {e}"
+            print(f"ERROR: {self._key_error}")
 
     def parse_lora_packet(self, line):
         """Extract LoRa packet information from gateway output"""
         try:
             # Look for JSON data in the line
-            json_match = re.search(r'\{"rxpk":\[.*?\]\}', line)
-            if not json_match:
+            start = line.find(_RXPK_PREFIX)
+            if start < 0:
                 return None
 
-            packet_data = json.loads(json_match.group())
-            if 'rxpk' not in packet_data or not packet_data['rxpk']:
+            packet_data = _loads_at(line, start)
+            rxpk_list = packet_data.get('rxpk')
+            if not isinstance(rxpk_list, list) or not rxpk_list:
                 return None
 
-            rxpk = packet_data['rxpk'][0]  # First packet
+            rxpk = rxpk_list[0]  # First packet
+            if not isinstance(rxpk, dict):
+                return None
 
             return {
                 'timestamp': rxpk.get('time', ''),
@@ -62,42 +230,23 @@ class LoRaSignalMonitor:
         except (json.JSONDecodeError, KeyError, IndexError):
             return None
 
-    def parse_lorawan_packet(self, payload_b64):
-        """Parse LoRaWAN packet structure to extract DevAddr and other fields"""
+    def parse_lorawan_packet(self, payload):
+        """Parse LoRaWAN packet structure (Base64 string or decoded bytes) to extract DevAddr and other fields"""
         try:
-            packet_bytes = base64.b64decode(payload_b64)
-            if len(packet_bytes) < 12:  # Minimum LoRaWAN packet size
+            packet_bytes = payload if isinstance(payload, bytes) else _b64d(payload)
+            header = _lorawan_header(packet_bytes)
+            if header is None:
                 return None
+            mhdr, msg_type, dev_addr, fctrl, fcnt, fport, payload_start = header
 
-            # LoRaWAN packet structure:
-            # MHDR (1) | DevAddr (4) | FCtrl (1) | FCnt (2) | FPort (1) | FRMPayload | MIC (4)
-
-            mhdr = packet_bytes[0]
-            msg_type = (mhdr >> 5) & 0x07
-
-            # Check if this is a data message (unconfirmed/confirmed uplink)
-            if msg_type not in [0x02, 0x04]:  # 010 = unconfirmed uplink, 100 = confirmed uplink
-                return None
-
-            # Extract DevAddr (4 bytes, little endian)
-            dev_addr = packet_bytes[1:5]
-            dev_addr_hex = dev_addr[::-1].hex().upper()  # Reverse for big endian display
-
-            fctrl = packet_bytes[5]
-            fcnt = int.from_bytes(packet_bytes[6:8], 'little')
-
-            # Check if FPort exists
-            fport = None
-            payload_start = 8
-            if fctrl & 0x0F == 0:  # No FOpts
-                if len(packet_bytes) > 12:  # Has FPort + payload + MIC
-                    fport = packet_bytes[8]
-                    payload_start = 9
+            # DevAddr is read as a little endian u32, so it formats in big endian display order
+            dev_addr_hex = f"{dev_addr:08X}"
 
             return {
                 'mhdr': mhdr,
                 'msg_type': msg_type,
                 'dev_addr': dev_addr_hex,
+                'dev_addr_u32': dev_addr,
                 'fctrl': fctrl,
                 'fcnt': fcnt,
                 'fport': fport,
@@ -112,26 +261,35 @@ class LoRaSignalMonitor:
         if not packet_info or not packet_info['data']:
             return False
 
+        # Reject other devices' frames by size and message type without decoding them
+        data = packet_info['data']
+        if (not isinstance(data, str) or len(data) != _V3_B64_LEN
+                or data[0] not in _UPLINK_B64_FIRST):
+            return False
+
         try:
-            # Parse LoRaWAN packet structure
-            lorawan_info = self.parse_lorawan_packet(packet_info['data'])
-            if not lorawan_info:
+            packet_bytes = _b64d(data)
+        except ValueError:
+            return False
+
+        try:
+            # Parse LoRaWAN header straight into a tuple, no per-packet dict
+            header = _lorawan_header(packet_bytes)
+            if header is None:
                 return False
+            _, _, dev_addr, _, _, fport, payload_start = header
+            # Keep the decoded frame so decrypt_payload does not decode it again
+            packet_info['data_bytes'] = packet_bytes
 
             # Method 1: Check if this is our specific DevAddr (from your V3 firmware)
             # Your V3 uses DevEUI 0102030405060708, check against known DevAddrs
-            known_dev_addrs = [
-                # Add your actual DevAddr here when you run the V3 device
-                # For now, we'll use a stricter approach
-            ]
-
-            current_dev_addr = lorawan_info['dev_addr']
+            current_dev_addr = f"{dev_addr:08X}"
+            if self._known_dev_addrs and dev_addr not in self._known_dev_addrs:
+                print(f"[FILTER] Rejected: DevAddr={current_dev_addr} (expected {self._expected_dev_addrs})")
+                return False
 
             # Method 2: Filter by packet characteristics specific to your V3 device
             # V3 firmware sends exactly 22-byte payloads on port 2
-            packet_bytes = lorawan_info['packet_bytes']
-            fport = lorawan_info.get('fport')
-            payload_start = lorawan_info['payload_start']
 
             # Extract payload length (excluding MIC)
             if len(packet_bytes) >= payload_start + 4:
@@ -153,14 +311,16 @@ class LoRaSignalMonitor:
             print(f"[FILTER] Error: {e}")
             return False
 
-    def decrypt_payload(self, data_b64):
-        """Decrypt LoRaWAN payload using proper LoRaWAN decryption"""
+    def decrypt_payload(self, data):
+        """Decrypt LoRaWAN payload (Base64 string or decoded bytes) using proper LoRaWAN decryption"""
         if not CRYPTO_AVAILABLE:
             return {"error": "Crypto library not available", "success": False}
+        if self._key_error:
+            return {"error": self._key_error, "success": False}
 
         try:
             # Parse LoRaWAN packet structure first
-            lorawan_info = self.parse_lorawan_packet(data_b64)
+            lorawan_info = self.parse_lorawan_packet(data)
             if not lorawan_info:
                 return {"error": "Invalid LoRaWAN packet structure", "success": False}
 
@@ -176,46 +336,36 @@ class LoRaSignalMonitor:
             if len(encrypted_payload) == 0:
                 return {"error": "No encrypted payload found", "success": False}
 
-            # For now, try simple AES decryption as fallback
-            key_bytes = binascii.unhexlify(self.config['app_key'])
-            cipher = AES.new(key_bytes, AES.MODE_ECB)
-
-            # Pad data to 32 bytes to handle full 22-byte sensor payload
-            padded_data = encrypted_payload
-            if len(padded_data) % 16 != 0:
-                padding = 16 - (len(padded_data) % 16)
-                padded_data += b'\x00' * padding
-
-            # Decrypt full payload (up to 32 bytes to cover 22-byte sensor data)
-            if len(padded_data) >= 32:
-                decrypted = cipher.decrypt(padded_data[:32])
+            if self._app_s_cipher is not None:
+                # Real LoRaWAN: FRMPayload XOR the AES-CTR keystream of the AppSKey
+                keystream = _frm_payload_keystream(self._app_s_cipher, packet_bytes[1:5],
+                                                   lorawan_info['fcnt'], len(encrypted_payload))
+                decrypted = (int.from_bytes(encrypted_payload, 'big')
+                             ^ int.from_bytes(keystream, 'big')).to_bytes(len(encrypted_payload), 'big')
             else:
-                decrypted = cipher.decrypt(padded_data)
+                # Without the AppSKey, try simple AES decryption as fallback
+                # Pad data to 32 bytes to handle full 22-byte sensor payload
+                padded_data = encrypted_payload
+                if len(padded_data) % 16 != 0:
+                    padding = 16 - (len(padded_data) % 16)
+                    padded_data += b'\x00' * padding
+
+                # Decrypt full payload (up to 32 bytes to cover 22-byte sensor data)
+                if len(padded_data) >= 32:
+                    decrypted = self._cipher.decrypt(padded_data[:32])
+                else:
+                    decrypted = self._cipher.decrypt(padded_data)
 
             # Try to parse as sensor data (22 bytes expected from firmware)
             sensor_data = {}
             if len(decrypted) >= 22:
-                # Accelerometer (6 bytes, scaled by 1000)
-                ax = int.from_bytes(decrypted[0:2], 'big', signed=True) / 1000.0
-                ay = int.from_bytes(decrypted[2:4], 'big', signed=True) / 1000.0
-                az = int.from_bytes(decrypted[4:6], 'big', signed=True) / 1000.0
-                sensor_data['accelerometer'] = {'x': ax, 'y': ay, 'z': az}
-
-                # Gyroscope (6 bytes, scaled by 10)
-                gx = int.from_bytes(decrypted[6:8], 'big', signed=True) / 10.0
-                gy = int.from_bytes(decrypted[8:10], 'big', signed=True) / 10.0
-                gz = int.from_bytes(decrypted[10:12], 'big', signed=True) / 10.0
-                sensor_data['gyroscope'] = {'x': gx, 'y': gy, 'z': gz}
-
-                # Magnetometer (6 bytes, scaled by 10)
-                mx = int.from_bytes(decrypted[12:14], 'big', signed=True) / 10.0
-                my = int.from_bytes(decrypted[14:16], 'big', signed=True) / 10.0
-                mz = int.from_bytes(decrypted[16:18], 'big', signed=True) / 10.0
-                sensor_data['magnetometer'] = {'x': mx, 'y': my, 'z': mz}
-
-                # ToF sensors (4 bytes total)
-                tof_c_raw = int.from_bytes(decrypted[18:20], 'big')
-                tof_d_raw = int.from_bytes(decrypted[20:22], 'big')
+                (axi, ayi, azi, gxi, gyi, gzi, mxi, myi, mzi,
+                 tof_c_raw, tof_d_raw) = _SENSOR_STRUCT.unpack_from(decrypted)
+
+                # Accelerometer scaled by 1000, gyroscope and magnetometer by 10
+                sensor_data['accelerometer'] = {'x': axi / 1000.0, 'y': ayi / 1000.0, 'z': azi / 1000.0}
+                sensor_data['gyroscope'] = {'x': gxi / 10.0, 'y': gyi / 10.0, 'z': gzi / 10.0}
+                sensor_data['magnetometer'] = {'x': mxi / 10.0, 'y': myi / 10.0, 'z': mzi / 10.0}
 
                 tof_c_mm = tof_c_raw if tof_c_raw != 0xFFFF else None
                 tof_d_mm = tof_d_raw if tof_d_raw != 0xFFFF else None
@@ -228,19 +378,10 @@ class LoRaSignalMonitor:
                 }
             elif len(decrypted) >= 16:
                 # Partial data fallback
-                ax = int.from_bytes(decrypted[0:2], 'big', signed=True) / 1000.0
-                ay = int.from_bytes(decrypted[2:4], 'big', signed=True) / 1000.0
-                az = int.from_bytes(decrypted[4:6], 'big', signed=True) / 1000.0
-                sensor_data['accelerometer'] = {'x': ax, 'y': ay, 'z': az}
-
-                gx = int.from_bytes(decrypted[6:8], 'big', signed=True) / 10.0
-                gy = int.from_bytes(decrypted[8:10], 'big', signed=True) / 10.0
-                gz = int.from_bytes(decrypted[10:12], 'big', signed=True) / 10.0
-                sensor_data['gyroscope'] = {'x': gx, 'y': gy, 'z': gz}
-
-                mx = int.from_bytes(decrypted[12:14], 'big', signed=True) / 10.0
-                my = int.from_bytes(decrypted[14:16], 'big', signed=True) / 10.0
-                sensor_data['magnetometer'] = {'x': mx, 'y': my, 'z': 'missing'}
+                axi, ayi, azi, gxi, gyi, gzi, mxi, myi = _PARTIAL_SENSOR_STRUCT.unpack_from(decrypted)
+                sensor_data['accelerometer'] = {'x': axi / 1000.0, 'y': ayi / 1000.0, 'z': azi / 1000.0}
+                sensor_data['gyroscope'] = {'x': gxi / 10.0, 'y': gyi / 10.0, 'z': gzi / 10.0}
+                sensor_data['magnetometer'] = {'x': mxi / 10.0, 'y': myi / 10.0, 'z': 'missing'}
                 sensor_data['tof'] = {'status': 'data_truncated'}
 
             return {
@@ -260,25 +401,9 @@ class LoRaSignalMonitor:
         rssi = packet_info['rssi']
         lsnr = packet_info['lsnr']
 
-        # Signal strength analysis
-        if rssi > -80:
-            signal_quality = "Excellent"
-        elif rssi > -100:
-            signal_quality = "Good"
-        elif rssi > -120:
-            signal_quality = "Fair"
-        else:
-            signal_quality = "Poor"
-
-        # SNR analysis
-        if lsnr > 5:
-            snr_quality = "Excellent"
-        elif lsnr > 0:
-            snr_quality = "Good"
-        elif lsnr > -10:
-            snr_quality = "Fair"
-        else:
-            snr_quality = "Poor"
+        # bisect_left counts the cuts strictly below the reading
+        signal_quality = _SIGNAL_LABELS[bisect.bisect_left(_RSSI_CUTS, rssi)]
+        snr_quality = _SIGNAL_LABELS[bisect.bisect_left(_SNR_CUTS, lsnr)]
 
         return {
             "signal_quality": signal_quality,
@@ -288,74 +413,77 @@ class LoRaSignalMonitor:
 
     def estimate_distance(self, rssi):
         """Rough distance estimation based on RSSI"""
-        if rssi > -50:
-            return "< 100m"
-        elif rssi > -80:
-            return "100m - 1km"
-        elif rssi > -100:
-            return "1km - 5km"
-        elif rssi > -120:
-            return "5km - 15km"
-        else:
-            return "> 15km"
+        return _DISTANCE_LABELS[bisect.bisect_left(_DISTANCE_CUTS, rssi)]
+
+    def _now_hms(self):
+        """Current time as HH:MM:SS, formatted at most once per second"""
+        now = int(time.time())
+        if now != self._ts_cache[0]:
+            self._ts_cache = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        return self._ts_cache[1]
 
     def print_packet_summary(self, packet_info, is_mine=False):
         """Print formatted packet information"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = self._now_hms()
 
         if is_mine:
-            print(f"\n🎯 MY DEVICE PACKET #{self.my_device_count}")
-            print(f"⏰ Time: {timestamp}")
-            print(f"📶 RSSI: {packet_info['rssi']} dBm")
-            print(f"📊 SNR: {packet_info['lsnr']} dB")
-            print(f"📻 Freq: {packet_info['frequency']} MHz")
-            print(f"📏 Size: {packet_info['size']} bytes")
-            print(f"📡 Rate: {packet_info['datarate']}")
-
             # Signal quality analysis
             quality = self.analyze_signal_quality(packet_info)
-            print(f"🔍 Quality: {quality['signal_quality']} ({quality['distance_estimate']})")
+            out = [_MINE_TEMPLATE.format(
+                count=self.my_device_count,
+                timestamp=timestamp,
+                rssi=packet_info['rssi'],
+                lsnr=packet_info['lsnr'],
+                frequency=packet_info['frequency'],
+                size=packet_info['size'],
+                datarate=packet_info['datarate'],
+                signal_quality=quality['signal_quality'],
+                distance_estimate=quality['distance_estimate'])]
 
             # Decryption attempt
             if packet_info['data']:
-                print(f"🔒 Raw Data: {packet_info['data'][:32]}...")
-                decrypt_result = self.decrypt_payload(packet_info['data'])
+                out.append(f"🔒 Raw Data: {packet_info['data'][:32]}...\n")
+                decrypt_result = self.decrypt_payload(packet_info.get('data_bytes') or packet_info['data'])
 
                 if decrypt_result.get('success'):
-                    print(f"📡 DevAddr: {decrypt_result.get('dev_addr', 'Unknown')}")
-                    print(f"📊 FCnt: {decrypt_result.get('fcnt', 'Unknown')}")
+                    out.append(f"📡 DevAddr: {decrypt_result.get('dev_addr', 'Unknown')}\n")
+                    out.append(f"📊 FCnt: {decrypt_result.get('fcnt', 'Unknown')}\n")
 
                     sensor_data = decrypt_result.get('sensor_data', {})
                     if sensor_data:
                         if 'accelerometer' in sensor_data:
                             acc = sensor_data['accelerometer']
-                            print(f"🏃 Accel [g]: X={acc['x']:.3f}, Y={acc['y']:.3f}, Z={acc['z']:.3f}")
+                            out.append(f"🏃 Accel [g]: X={acc['x']:.3f}, Y={acc['y']:.3f}, Z={acc['z']:.3f}\n")
                         if 'gyroscope' in sensor_data:
                             gyro = sensor_data['gyroscope']
-                            print(f"🌀 Gyro [dps]: X={gyro['x']:.1f}, Y={gyro['y']:.1f}, Z={gyro['z']:.1f}")
+                            out.append(f"🌀 Gyro [dps]: X={gyro['x']:.1f}, Y={gyro['y']:.1f}, Z={gyro['z']:.1f}\n")
                         if 'magnetometer' in sensor_data:
                             mag = sensor_data['magnetometer']
                             if isinstance(mag['z'], (int, float)):
-                                print(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']:.1f}")
+                                out.append(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']:.1f}\n")
                             else:
-                                print(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']}")
+                                out.append(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']}\n")
                         if 'tof' in sensor_data:
                             tof = sensor_data['tof']
                             if 'distance_c_mm' in tof:
                                 c_str = f"{tof['distance_c_mm']}mm" if tof['c_valid'] else "Out of Range"
                                 d_str = f"{tof['distance_d_mm']}mm" if tof['d_valid'] else "Out of Range"
-                                print(f"📏 ToF C: {c_str}, ToF D: {d_str}")
+                                out.append(f"📏 ToF C: {c_str}, ToF D: {d_str}\n")
                             else:
-                                print(f"📏 ToF: {tof.get('status', 'unknown')}")
+                                out.append(f"📏 ToF: {tof.get('status', 'unknown')}\n")
                     else:
-                        print(f"🔢 Hex: {decrypt_result['hex'][:32]}...")
+                        out.append(f"🔢 Hex: {decrypt_result['hex'][:32]}...\n")
                 else:
-                    print(f"❌ Decrypt failed: {decrypt_result.get('error', 'Unknown')}")
-            print("-" * 50)
+                    out.append(f"❌ Decrypt failed: {decrypt_result.get('error', 'Unknown')}\n")
+            out.append(_SEPARATOR)
+            # One write per packet instead of one print per line
+            sys.stdout.write("".join(out))
         else:
-            print(f"[{timestamp}] #{self.packet_count} Other device: "
-                  f"RSSI={packet_info['rssi']}dBm, "
-                  f"Freq={packet_info['frequency']}MHz")
+            sys.stdout.write(_OTHER_TEMPLATE.format(
+                timestamp=timestamp,
+                count=self.packet_count,
+                rssi=packet_info['rssi'],
+                frequency=packet_info['frequency']))
 
     def print_statistics(self):
         """Print session statistics"""
@@ -381,33 +509,78 @@ class LoRaSignalMonitor:
         print("=" * 60)
 
         try:
-            while True:
-                try:
-                    line = input()
-                    packet_info = self.parse_lora_packet(line)
-
-                    if packet_info:
-                        self.packet_count += 1
-                        is_mine = self.is_my_device(packet_info)
-
-                        if is_mine:
-                            self.my_device_count += 1
-                            self.print_packet_summary(packet_info, True)
-                        elif show_all:
-                            self.print_packet_summary(packet_info, False)
-
-                except EOFError:
-                    break
+            # Buffered binary reads: no per-line input() prompt handling, loop ends at EOF
+            for raw in sys.stdin.buffer:
+                line = raw.decode('ascii', 'replace')
+                packet_info = self.parse_lora_packet(line)
+
+                if packet_info:
+                    self.packet_count += 1
+                    is_mine = self.is_my_device(packet_info)
+
+                    if is_mine:
+                        self.my_device_count += 1
+                        self.print_packet_summary(packet_info, True)
+                    elif show_all:
+                        self.print_packet_summary(packet_info, False)
 
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user")
         finally:
             self.print_statistics()
 
+    def batch(self, stream, show_all=False):
+        """Filter a captured gateway log through the header kernel, _BATCH_SIZE packets at a time"""
+        whitelist = np.array(sorted(self._known_dev_addrs), dtype=np.uint32)
+        pending = []
+        for raw in stream:
+            packet_info = self.parse_lora_packet(raw.decode('ascii', 'replace'))
+            if packet_info:
+                pending.append(packet_info)
+                if len(pending) == _BATCH_SIZE:
+                    self._process_batch(pending, whitelist, show_all)
+                    pending = []
+        if pending:
+            self._process_batch(pending, whitelist, show_all)
+        self.print_statistics()
+
+    def _process_batch(self, packets, whitelist, show_all):
+        """Decode candidate frames, run _match_frames once, then report in input order"""
+        buf = np.zeros((len(packets), _BATCH_HEADER_LEN), dtype=np.uint8)
+        lengths = np.zeros(len(packets), dtype=np.int32)
+        for i, packet_info in enumerate(packets):
+            data = packet_info['data']
+            if (not isinstance(data, str) or len(data) != _V3_B64_LEN
+                    or data[0] not in _UPLINK_B64_FIRST):
+                continue  # length 0 marks the frame as not mine
+            try:
+                frame = _b64d(data)
+            except ValueError:
+                continue
+            if len(frame) < _BATCH_HEADER_LEN:
+                continue  # stray characters padded the base64 to length; too short to stage
+            packet_info['data_bytes'] = frame
+            buf[i] = np.frombuffer(frame, dtype=np.uint8, count=_BATCH_HEADER_LEN)
+            lengths[i] = len(frame)
+
+        matches = np.zeros(len(packets), dtype=np.bool_)
+        _match_frames(buf, lengths, whitelist, matches)
+
+        for packet_info, is_mine in zip(packets, matches.tolist()):
+            self.packet_count += 1
+            if is_mine:
+                self.my_device_count += 1
+                self.print_packet_summary(packet_info, True)
+            elif show_all:
+                self.print_packet_summary(packet_info, False)
+
 def load_config():
     """Load device configuration from file"""
     config_file = "rak_device_config.json"
     try:
+        if ORJSON_AVAILABLE:
+            with open(config_file, 'rb') as f:
+                return orjson.loads(f.read())
         with open(config_file, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
@@ -417,8 +590,12 @@ def save_config(config):
     """Save device configuration to file"""
     config_file = "rak_device_config.json"
     try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        if ORJSON_AVAILABLE:
+            with open(config_file, 'wb') as f:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        else:
+            with open(config_file, 'w') as f:
+                json.dump(config, f, indent=2)
         print(f"Configuration saved to {config_file}")
     except Exception as e:
         print(f"Failed to save config: {e}")
@@ -451,6 +628,11 @@ def configure_device():
     if dev_addr:
         config['dev_addr'] = dev_addr.replace('-', '').replace(':', '').upper()
 
+    # Optional: AppSKey from the join for real LoRaWAN payload decryption
+    app_s_key = input(f"AppSKey (optional, for LoRaWAN decryption): ").strip()
+    if app_s_key:
+        config['app_s_key'] = app_s_key.replace('-', '').replace(':', '').upper()
+
     print("\n📋 Current V3 Device Signature:")
     print("- DevEUI: 0102030405060708")
     print("- AppEUI: 1112131415161718")
@@ -475,6 +657,14 @@ def main():
             if packet_info:
                 monitor.print_packet_summary(packet_info, True)
             return
+        elif sys.argv[1] == "batch":
+            # Offline filter of a captured log: python3 rak_signal_monitor.py batch [all] < capture.log
+            if not NUMPY_AVAILABLE:
+                print("ERROR: numpy is required for batch mode")
+                return
+            monitor = LoRaSignalMonitor(load_config())
+            monitor.batch(sys.stdin.buffer, show_all=sys.argv[2:3] == ["all"])
+            return
         elif sys.argv[1] == "all":
             # Monitor all devices
             config = load_config()
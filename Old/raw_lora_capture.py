@@ -5,13 +5,20 @@ Captures raw LoRa packets directly from RAK7371 gateway
 No LoRaWAN network server required
 """
 
-import base64
 import binascii
+import bisect
 import sys
 import json
 import re
+import struct
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# SIMD base64 codec when available, stdlib otherwise
+try:
+    from pybase64 import b64decode, b64encode
+except ImportError:
+    from base64 import b64decode, b64encode
 
 try:
     from Crypto.Cipher import AES
@@ -20,42 +27,159 @@ except ImportError:
     CRYPTO_AVAILABLE = False
     print("WARNING: pycryptodome not installed. Encryption features disabled.")
 
+# NumPy is only needed for batch decoding of captured logs
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Sensorite V4 device configuration
 DEVICE_ID = 0x5353  # "SS" for Sensorite
 EXPECTED_PACKET_SIZE = 26  # 2 bytes header + 2 bytes counter + 22 bytes sensor data
 
+# Sensorite V4 packet layout (big endian):
+# header: device ID, counter
+# sensor block: accel x/y/z | gyro x/y/z | mag x/y/z | ToF C, ToF D
+_HEADER_STRUCT = struct.Struct(">HH")
+_SENSOR_STRUCT = struct.Struct(">hhh hhh hhh HH")
+# Whole packet, used to build packets in the same layout the parser reads
+_SENSORITE_STRUCT = struct.Struct(_HEADER_STRUCT.format + _SENSOR_STRUCT.format[1:])
+
+if NUMPY_AVAILABLE:
+    # Same layout as a structured dtype, one record per packet
+    _SENSORITE_DTYPE = np.dtype([('dev', '>u2'), ('cnt', '>u2'), ('accel', '>i2', 3),
+                                 ('gyro', '>i2', 3), ('mag', '>i2', 3), ('tof', '>u2', 2)])
+
+# print_packet_summary output, written with a single sys.stdout.write per packet
+_PACKET_TEMPLATE = (
+    "\n🎯 SENSORITE V4 PACKET #{count}\n"
+    "⏰ Time: {timestamp}\n"
+    "📶 RSSI: {rssi} dBm\n"
+    "📊 SNR: {lsnr} dB\n"
+    "📻 Freq: {frequency} MHz\n"
+    "📏 Size: {size} bytes\n"
+    "📡 Rate: {datarate}\n"
+    "🔍 Quality: {signal_quality} ({distance_estimate})\n"
+    "{body}"
+    + "-" * 50 + "\n"
+)
+_SENSOR_TEMPLATE = (
+    "🆔 Device ID: {device_id}\n"
+    "📊 Packet #: {packet_counter}\n"
+    "🏃 Accel [g]: X={acc[x]:.3f}, Y={acc[y]:.3f}, Z={acc[z]:.3f}\n"
+    "🌀 Gyro [dps]: X={gyro[x]:.1f}, Y={gyro[y]:.1f}, Z={gyro[z]:.1f}\n"
+    "🧭 Mag [µT]: X={mag[x]:.1f}, Y={mag[y]:.1f}, Z={mag[z]:.1f}\n"
+    "📏 ToF C: {tof_c}, ToF D: {tof_d}\n"
+    "🔢 Raw: {raw}...\n"
+)
+
+# Signal classification: a reading above the i-th cut gets label i + 1
+_RSSI_CUTS = (-120, -100, -80)
+_SNR_CUTS = (-10, 0, 5)
+_SIGNAL_LABELS = ("Poor", "Fair", "Good", "Excellent")
+_DISTANCE_CUTS = (-120, -100, -80, -50)
+_DISTANCE_LABELS = ("> 15km", "5km - 15km", "1km - 5km", "100m - 1km", "< 100m")
+
+# Gateway output formats recognised by parse_raw_lora_packet
+_RXPK_RE = re.compile(r'\{"rxpk":\[.*?\]\}')
+_RAW_DEBUG_RE = re.compile(r'INFO: \[RAW\] freq=([0-9.]+) rssi=(-?[0-9]+) snr=(-?[0-9.]+) size=([0-9]+) data=([A-Fa-f0-9]+)')
+
+def _decode_sensor_payload(buf, offset=0):
+    """
+    Decode the 22-byte sensor block starting at offset
+    Returns (ax, ay, az, gx, gy, gz, mx, my, mz, tof_c_mm, tof_d_mm), ToF None when out of range
+    """
+    (axi, ayi, azi, gxi, gyi, gzi, mxi, myi, mzi,
+     tof_c_raw, tof_d_raw) = _SENSOR_STRUCT.unpack_from(buf, offset)
+
+    # Accelerometer scaled by 1000, gyroscope and magnetometer by 10
+    return (axi / 1000.0, ayi / 1000.0, azi / 1000.0,
+            gxi / 10.0, gyi / 10.0, gzi / 10.0,
+            mxi / 10.0, myi / 10.0, mzi / 10.0,
+            tof_c_raw if tof_c_raw != 0xFFFF else None,
+            tof_d_raw if tof_d_raw != 0xFFFF else None)
+
+def _decode_data(data_b64):
+    """Base64 payload to bytes, None when the gateway sent a malformed or missing value"""
+    try:
+        return b64decode(data_b64)
+    except (binascii.Error, ValueError, TypeError):  # bad padding, non-ASCII str, null
+        return None
+
+def bulk_decode(packets, rssi=None):
+    """
+    Decode many Sensorite packets at once (requires numpy)
+    packets: concatenated 26-byte packets or an (N, 26) uint8 array
+    Returns a dict of per-packet arrays; quality/distance labels when rssi is given
+    """
+    if isinstance(packets, (bytes, bytearray, memoryview)):
+        packets = np.frombuffer(packets, dtype=np.uint8)
+    packets = np.ascontiguousarray(packets, dtype=np.uint8).reshape(-1, EXPECTED_PACKET_SIZE)
+    records = packets.view(_SENSORITE_DTYPE)[:, 0]
+
+    tof = records['tof']
+    result = {
+        "device_id": records['dev'],
+        "packet_counter": records['cnt'],
+        "accelerometer": records['accel'] / 1000.0,
+        "gyroscope": records['gyro'] / 10.0,
+        "magnetometer": records['mag'] / 10.0,
+        "tof_mm": tof,
+        "tof_valid": tof != 0xFFFF,
+    }
+
+    if rssi is not None:
+        # searchsorted(side='left') counts the cuts strictly below each reading
+        rssi = np.asarray(rssi)
+        result["signal_quality"] = np.array(_SIGNAL_LABELS)[np.searchsorted(_RSSI_CUTS, rssi)]
+        result["distance_estimate"] = np.array(_DISTANCE_LABELS)[np.searchsorted(_DISTANCE_CUTS, rssi)]
+
+    return result
+
 class RawLoRaCapture:
     def __init__(self):
         self.packet_count = 0
         self.sensorite_count = 0
-        self.start_time = datetime.now()
+        self.start_ns = time.monotonic_ns()
 
     def parse_raw_lora_packet(self, line):
         """Extract raw LoRa packet information from gateway output"""
-        try:
-            # Look for JSON data in the line (standard LoRaWAN format)
-            json_match = re.search(r'\\{"rxpk":\\[.*?\\]\\}', line)
-            if json_match:
-                packet_data = json.loads(json_match.group())
-                if 'rxpk' in packet_data and packet_data['rxpk']:
-                    rxpk = packet_data['rxpk'][0]  # First packet
-                    return {
-                        'timestamp': rxpk.get('time', ''),
-                        'frequency': rxpk.get('freq', 0),
-                        'rssi': rxpk.get('rssi', 0),
-                        'lsnr': rxpk.get('lsnr', 0),
-                        'datarate': rxpk.get('datr', ''),
-                        'size': rxpk.get('size', 0),
-                        'data': rxpk.get('data', ''),
-                        'channel': rxpk.get('chan', 0),
-                        'packet_type': 'lorawan'
-                    }
+        # Cheap substring gates keep the regexes off lines without LoRa content
+        if ('"rxpk"' not in line and 'INFO: [RAW]' not in line
+                and not line.startswith('RXPK,')):
+            return None
 
-            # Look for raw LoRa packet format (modified packet forwarder)
-            # Format: RXPK,timestamp,freq,rssi,lsnr,sf,bw,cr,size,data
-            if line.startswith('RXPK,'):
-                parts = line.strip().split(',')
-                if len(parts) >= 10:
+        # Look for JSON data in the line (standard LoRaWAN format)
+        if '"rxpk"' in line:
+            json_match = _RXPK_RE.search(line)
+            if json_match:
+                try:
+                    packet_data = json.loads(json_match.group())
+                    if packet_data.get('rxpk'):
+                        rxpk = packet_data['rxpk'][0]  # First packet
+                        return {
+                            'timestamp': rxpk.get('time', ''),
+                            'frequency': rxpk.get('freq', 0),
+                            'rssi': rxpk.get('rssi', 0),
+                            'lsnr': rxpk.get('lsnr', 0),
+                            'datarate': rxpk.get('datr', ''),
+                            'size': rxpk.get('size', 0),
+                            'data': rxpk.get('data', ''),
+                            'data_bytes': _decode_data(rxpk.get('data', '')),
+                            'channel': rxpk.get('chan', 0),
+                            'packet_type': 'lorawan'
+                        }
+                except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+                    # truncated JSON (JSONDecodeError is a ValueError) or an unexpected rxpk shape
+                    return None
+
+        # Look for raw LoRa packet format (modified packet forwarder)
+        # Format: RXPK,timestamp,freq,rssi,lsnr,sf,bw,cr,size,data
+        if line.startswith('RXPK,'):
+            parts = line.strip().split(',')
+            if len(parts) >= 10:
+                try:
                     return {
                         'timestamp': parts[1],
                         'frequency': float(parts[2]),
@@ -64,86 +188,68 @@ class RawLoRaCapture:
                         'datarate': f"SF{parts[5]}BW{parts[6]}",
                         'size': int(parts[8]),
                         'data': parts[9],
+                        'data_bytes': _decode_data(parts[9]),
                         'channel': 0,
                         'packet_type': 'raw_lora'
                     }
+                except ValueError:  # non-numeric field
+                    return None
 
-            # Alternative: Look for packet forwarder debug output
-            # Format: "INFO: [RAW] freq=915.2 rssi=-89 snr=8.5 size=26 data=535300050033..."
-            raw_match = re.search(r'INFO: \\[RAW\\] freq=([0-9.]+) rssi=(-?[0-9]+) snr=(-?[0-9.]+) size=([0-9]+) data=([A-Fa-f0-9]+)', line)
+        # Alternative: Look for packet forwarder debug output
+        # Format: "INFO: [RAW] freq=915.2 rssi=-89 snr=8.5 size=26 data=535300050033..."
+        if 'INFO: [RAW]' in line:
+            raw_match = _RAW_DEBUG_RE.search(line)
             if raw_match:
-                return {
-                    'timestamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
-                    'frequency': float(raw_match.group(1)),
-                    'rssi': int(raw_match.group(2)),
-                    'lsnr': float(raw_match.group(3)),
-                    'datarate': "SF7BW125",  # Default for V4
-                    'size': int(raw_match.group(4)),
-                    'data': base64.b64encode(bytes.fromhex(raw_match.group(5))).decode(),
-                    'channel': 0,
-                    'packet_type': 'raw_debug'
-                }
+                try:
+                    data_bytes = bytes.fromhex(raw_match.group(5))
+                    # This format carries no time, so the one clock read here also
+                    # serves as the display time in monitor()
+                    now = datetime.now()
+                    return {
+                        'timestamp': now.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                        'received_at': now,
+                        'frequency': float(raw_match.group(1)),
+                        'rssi': int(raw_match.group(2)),
+                        'lsnr': float(raw_match.group(3)),
+                        'datarate': "SF7BW125",  # Default for V4
+                        'size': int(raw_match.group(4)),
+                        'data': b64encode(data_bytes).decode(),
+                        'data_bytes': data_bytes,
+                        'channel': 0,
+                        'packet_type': 'raw_debug'
+                    }
+                except ValueError:  # odd-length hex or malformed number
+                    return None
 
-            return None
-        except (json.JSONDecodeError, KeyError, IndexError, ValueError):
-            return None
+        return None
 
     def is_sensorite_packet(self, packet_info):
         """Check if packet is from Sensorite V4 device"""
         if not packet_info or not packet_info['data']:
             return False
 
-        try:
-            # Decode packet data
-            packet_bytes = base64.b64decode(packet_info['data'])
-
-            # Check packet size
-            if len(packet_bytes) != EXPECTED_PACKET_SIZE:
-                return False
-
-            # Check device ID in header (first 2 bytes)
-            if len(packet_bytes) >= 2:
-                device_id = (packet_bytes[0] << 8) | packet_bytes[1]
-                if device_id == DEVICE_ID:
-                    return True
+        # Packet data was decoded once by parse_raw_lora_packet
+        packet_bytes = packet_info['data_bytes']
 
-            return False
-        except:
+        # Check packet size (None when the payload could not be decoded)
+        if packet_bytes is None or len(packet_bytes) != EXPECTED_PACKET_SIZE:
             return False
 
-    def parse_sensorite_data(self, data_b64):
-        """Parse Sensorite V4 packet format"""
+        # Check device ID in header (first 2 bytes)
+        device_id = (packet_bytes[0] << 8) | packet_bytes[1]
+        return device_id == DEVICE_ID
+
+    def parse_sensorite_data(self, data):
+        """Parse Sensorite V4 packet format (raw bytes or base64 string)"""
         try:
-            packet_bytes = base64.b64decode(data_b64)
+            packet_bytes = data if isinstance(data, (bytes, bytearray)) else b64decode(data)
 
             if len(packet_bytes) != EXPECTED_PACKET_SIZE:
                 return {"error": f"Invalid packet size: {len(packet_bytes)} (expected {EXPECTED_PACKET_SIZE})", "success": False}
 
-            # Parse header (4 bytes)
-            device_id = (packet_bytes[0] << 8) | packet_bytes[1]
-            packet_counter = (packet_bytes[2] << 8) | packet_bytes[3]
-
-            # Parse accelerometer (6 bytes, scaled by 1000)
-            ax = int.from_bytes(packet_bytes[4:6], 'big', signed=True) / 1000.0
-            ay = int.from_bytes(packet_bytes[6:8], 'big', signed=True) / 1000.0
-            az = int.from_bytes(packet_bytes[8:10], 'big', signed=True) / 1000.0
-
-            # Parse gyroscope (6 bytes, scaled by 10)
-            gx = int.from_bytes(packet_bytes[10:12], 'big', signed=True) / 10.0
-            gy = int.from_bytes(packet_bytes[12:14], 'big', signed=True) / 10.0
-            gz = int.from_bytes(packet_bytes[14:16], 'big', signed=True) / 10.0
-
-            # Parse magnetometer (6 bytes, scaled by 10)
-            mx = int.from_bytes(packet_bytes[16:18], 'big', signed=True) / 10.0
-            my = int.from_bytes(packet_bytes[18:20], 'big', signed=True) / 10.0
-            mz = int.from_bytes(packet_bytes[20:22], 'big', signed=True) / 10.0
-
-            # Parse ToF sensors (4 bytes)
-            tof_c_raw = int.from_bytes(packet_bytes[22:24], 'big')
-            tof_d_raw = int.from_bytes(packet_bytes[24:26], 'big')
-
-            tof_c_mm = tof_c_raw if tof_c_raw != 0xFFFF else None
-            tof_d_mm = tof_d_raw if tof_d_raw != 0xFFFF else None
+            device_id, packet_counter = _HEADER_STRUCT.unpack_from(packet_bytes)
+            (ax, ay, az, gx, gy, gz, mx, my, mz,
+             tof_c_mm, tof_d_mm) = _decode_sensor_payload(packet_bytes, _HEADER_STRUCT.size)
 
             return {
                 "device_id": f"0x{device_id:04X}",
@@ -163,7 +269,7 @@ class RawLoRaCapture:
                 "success": True
             }
 
-        except Exception as e:
+        except binascii.Error as e:
             return {"error": str(e), "success": False}
 
     def analyze_signal_quality(self, packet_info):
@@ -171,25 +277,9 @@ class RawLoRaCapture:
         rssi = packet_info['rssi']
         lsnr = packet_info['lsnr']
 
-        # Signal strength analysis
-        if rssi > -80:
-            signal_quality = "Excellent"
-        elif rssi > -100:
-            signal_quality = "Good"
-        elif rssi > -120:
-            signal_quality = "Fair"
-        else:
-            signal_quality = "Poor"
-
-        # SNR analysis
-        if lsnr > 5:
-            snr_quality = "Excellent"
-        elif lsnr > 0:
-            snr_quality = "Good"
-        elif lsnr > -10:
-            snr_quality = "Fair"
-        else:
-            snr_quality = "Poor"
+        # bisect_left counts the cuts strictly below the reading
+        signal_quality = _SIGNAL_LABELS[bisect.bisect_left(_RSSI_CUTS, rssi)]
+        snr_quality = _SIGNAL_LABELS[bisect.bisect_left(_SNR_CUTS, lsnr)]
 
         return {
             "signal_quality": signal_quality,
@@ -199,65 +289,44 @@ class RawLoRaCapture:
 
     def estimate_distance(self, rssi):
         """Rough distance estimation based on RSSI"""
-        if rssi > -50:
-            return "< 100m"
-        elif rssi > -80:
-            return "100m - 1km"
-        elif rssi > -100:
-            return "1km - 5km"
-        elif rssi > -120:
-            return "5km - 15km"
-        else:
-            return "> 15km"
+        return _DISTANCE_LABELS[bisect.bisect_left(_DISTANCE_CUTS, rssi)]
 
-    def print_packet_summary(self, packet_info, parse_result):
+    def print_packet_summary(self, packet_info, parse_result, now=None):
         """Print formatted packet information"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = (now or datetime.now()).strftime("%H:%M:%S")
 
-        print(f"\\n🎯 SENSORITE V4 PACKET #{self.sensorite_count}")
-        print(f"⏰ Time: {timestamp}")
-        print(f"📶 RSSI: {packet_info['rssi']} dBm")
-        print(f"📊 SNR: {packet_info['lsnr']} dB")
-        print(f"📻 Freq: {packet_info['frequency']} MHz")
-        print(f"📏 Size: {packet_info['size']} bytes")
-        print(f"📡 Rate: {packet_info['datarate']}")
-
-        # Signal quality analysis
         quality = self.analyze_signal_quality(packet_info)
-        print(f"🔍 Quality: {quality['signal_quality']} ({quality['distance_estimate']})")
 
         if parse_result.get('success'):
-            print(f"🆔 Device ID: {parse_result['device_id']}")
-            print(f"📊 Packet #: {parse_result['packet_counter']}")
-
-            sensor_data = parse_result.get('sensor_data', {})
-            if 'accelerometer' in sensor_data:
-                acc = sensor_data['accelerometer']
-                print(f"🏃 Accel [g]: X={acc['x']:.3f}, Y={acc['y']:.3f}, Z={acc['z']:.3f}")
-
-            if 'gyroscope' in sensor_data:
-                gyro = sensor_data['gyroscope']
-                print(f"🌀 Gyro [dps]: X={gyro['x']:.1f}, Y={gyro['y']:.1f}, Z={gyro['z']:.1f}")
-
-            if 'magnetometer' in sensor_data:
-                mag = sensor_data['magnetometer']
-                print(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']:.1f}")
-
-            if 'tof' in sensor_data:
-                tof = sensor_data['tof']
-                c_str = f"{tof['distance_c_mm']}mm" if tof['c_valid'] else "Out of Range"
-                d_str = f"{tof['distance_d_mm']}mm" if tof['d_valid'] else "Out of Range"
-                print(f"📏 ToF C: {c_str}, ToF D: {d_str}")
-
-            print(f"🔢 Raw: {parse_result['raw_hex'][:32]}...")
+            sensor_data = parse_result['sensor_data']
+            tof = sensor_data['tof']
+            body = _SENSOR_TEMPLATE.format(
+                device_id=parse_result['device_id'],
+                packet_counter=parse_result['packet_counter'],
+                acc=sensor_data['accelerometer'],
+                gyro=sensor_data['gyroscope'],
+                mag=sensor_data['magnetometer'],
+                tof_c=f"{tof['distance_c_mm']}mm" if tof['c_valid'] else "Out of Range",
+                tof_d=f"{tof['distance_d_mm']}mm" if tof['d_valid'] else "Out of Range",
+                raw=parse_result['raw_hex'][:32])
         else:
-            print(f"❌ Parse failed: {parse_result.get('error', 'Unknown')}")
-
-        print("-" * 50)
+            body = f"❌ Parse failed: {parse_result.get('error', 'Unknown')}\n"
+
+        sys.stdout.write(_PACKET_TEMPLATE.format(
+            count=self.sensorite_count,
+            timestamp=timestamp,
+            rssi=packet_info['rssi'],
+            lsnr=packet_info['lsnr'],
+            frequency=packet_info['frequency'],
+            size=packet_info['size'],
+            datarate=packet_info['datarate'],
+            signal_quality=quality['signal_quality'],
+            distance_estimate=quality['distance_estimate'],
+            body=body))
 
     def print_statistics(self):
         """Print session statistics"""
-        duration = datetime.now() - self.start_time
+        duration = timedelta(microseconds=(time.monotonic_ns() - self.start_ns) // 1000)
         print(f"\\n📊 SESSION STATISTICS")
         print(f"Duration: {duration}")
         print(f"Total packets: {self.packet_count}")
@@ -266,6 +335,36 @@ class RawLoRaCapture:
             percentage = (self.sensorite_count / self.packet_count) * 100
             print(f"Sensorite percentage: {percentage:.1f}%")
 
+    def batch(self, stream):
+        """Decode every Sensorite packet of a captured gateway log in one pass"""
+        packets = []
+        rssi = []
+        for line in stream:
+            packet_info = self.parse_raw_lora_packet(line.rstrip('\n'))
+            if packet_info:
+                self.packet_count += 1
+                if self.is_sensorite_packet(packet_info):
+                    packets.append(packet_info['data_bytes'])
+                    rssi.append(packet_info['rssi'])
+        self.sensorite_count = len(packets)
+
+        if packets:
+            decoded = bulk_decode(b''.join(packets), rssi)
+            for i in range(len(packets)):
+                acc = decoded['accelerometer'][i]
+                gyro = decoded['gyroscope'][i]
+                mag = decoded['magnetometer'][i]
+                tof_c, tof_d = (f"{mm}mm" if valid else "Out of Range"
+                                for mm, valid in zip(decoded['tof_mm'][i], decoded['tof_valid'][i]))
+                print(f"#{decoded['packet_counter'][i]} "
+                      f"Accel [g]: X={acc[0]:.3f}, Y={acc[1]:.3f}, Z={acc[2]:.3f} | "
+                      f"Gyro [dps]: X={gyro[0]:.1f}, Y={gyro[1]:.1f}, Z={gyro[2]:.1f} | "
+                      f"Mag [µT]: X={mag[0]:.1f}, Y={mag[1]:.1f}, Z={mag[2]:.1f} | "
+                      f"ToF C: {tof_c}, ToF D: {tof_d} | "
+                      f"{decoded['signal_quality'][i]} ({decoded['distance_estimate'][i]})")
+
+        self.print_statistics()
+
     def monitor(self, show_all=False):
         """Main monitoring loop"""
         print("🎯 Sensorite V4 Raw LoRa Capture")
@@ -279,28 +378,27 @@ class RawLoRaCapture:
         print("=" * 60)
 
         try:
-            while True:
-                try:
-                    line = input()
-                    packet_info = self.parse_raw_lora_packet(line)
-
-                    if packet_info:
-                        self.packet_count += 1
-                        is_sensorite = self.is_sensorite_packet(packet_info)
-
-                        if is_sensorite:
-                            self.sensorite_count += 1
-                            parse_result = self.parse_sensorite_data(packet_info['data'])
-                            self.print_packet_summary(packet_info, parse_result)
-                        elif show_all:
-                            timestamp = datetime.now().strftime("%H:%M:%S")
-                            print(f"[{timestamp}] #{self.packet_count} Other device: "
-                                  f"RSSI={packet_info['rssi']}dBm, "
-                                  f"Size={packet_info['size']}B, "
-                                  f"Freq={packet_info['frequency']}MHz")
-
-                except EOFError:
-                    break
+            for line in sys.stdin:
+                line = line.rstrip('\n')
+                packet_info = self.parse_raw_lora_packet(line)
+
+                if packet_info:
+                    self.packet_count += 1
+                    is_sensorite = self.is_sensorite_packet(packet_info)
+
+                    # At most one wall-clock read per packet, and none for packets not displayed
+                    if is_sensorite:
+                        self.sensorite_count += 1
+                        parse_result = self.parse_sensorite_data(packet_info['data_bytes'])
+                        now = packet_info.get('received_at') or datetime.now()
+                        self.print_packet_summary(packet_info, parse_result, now)
+                    elif show_all:
+                        now = packet_info.get('received_at') or datetime.now()
+                        timestamp = now.strftime("%H:%M:%S")
+                        print(f"[{timestamp}] #{self.packet_count} Other device: "
+                              f"RSSI={packet_info['rssi']}dBm, "
+                              f"Size={packet_info['size']}B, "
+                              f"Freq={packet_info['frequency']}MHz")
 
         except KeyboardInterrupt:
             print("\\n🛑 Monitoring stopped by user")
@@ -313,19 +411,26 @@ def main():
             # Test mode with sample data
             capture = RawLoRaCapture()
             # Create a test packet with Sensorite V4 format
-            test_data = bytearray(26)
-            test_data[0:2] = DEVICE_ID.to_bytes(2, 'big')  # Device ID
-            test_data[2:4] = (42).to_bytes(2, 'big')       # Packet counter
-            test_data[4:6] = (1234).to_bytes(2, 'big', signed=True)   # Accel X
-            test_data[6:8] = (-567).to_bytes(2, 'big', signed=True)   # Accel Y
-            test_data[8:10] = (890).to_bytes(2, 'big', signed=True)   # Accel Z
-            # ... fill rest with test data
-            test_b64 = base64.b64encode(test_data).decode()
+            test_data = _SENSORITE_STRUCT.pack(
+                DEVICE_ID, 42,       # Device ID, packet counter
+                1234, -567, 890,     # Accel X/Y/Z
+                0, 0, 0,             # Gyro X/Y/Z
+                0, 0, 0,             # Mag X/Y/Z
+                0xFFFF, 0xFFFF)      # ToF C/D out of range
+            test_b64 = b64encode(test_data).decode()
 
             parse_result = capture.parse_sensorite_data(test_b64)
             print("🧪 Test Mode - Sample Sensorite V4 Packet:")
             print(json.dumps(parse_result, indent=2))
             return
+        elif sys.argv[1] == "batch":
+            # Offline decode of a captured log: python3 raw_lora_capture.py batch < capture.log
+            if not NUMPY_AVAILABLE:
+                print("ERROR: numpy is required for batch mode")
+                return
+            capture = RawLoRaCapture()
+            capture.batch(sys.stdin)
+            return
         elif sys.argv[1] == "all":
             # Monitor all devices
             capture = RawLoRaCapture()
@@ -0,0 +1,37 @@
+"""Regression checks for rak_signal_monitor batch mode (requires numpy)"""
+import base64
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import rak_signal_monitor as rsm
+
+
+def _packet(monitor, data):
+    return monitor.parse_lora_packet('{"rxpk":[{"rssi":-45,"freq":915.0,"data":"%s"}]}' % data)
+
+
+def test_batch_skips_frame_shorter_than_staged_header():
+    monitor = rsm.LoRaSignalMonitor(rsm.DEFAULT_CONFIG)
+    # Passes the 48-char base64 prefilter, but the stray characters decode to only 3 bytes
+    short = _packet(monitor, "QAAA" + "!" * 44)
+    assert len(short['data']) == rsm._V3_B64_LEN
+
+    monitor._process_batch([short], np.zeros(0, dtype=np.uint32), show_all=False)
+
+    assert monitor.packet_count == 1
+    assert monitor.my_device_count == 0
+
+
+def test_batch_still_matches_v3_frame_alongside_short_frame():
+    monitor = rsm.LoRaSignalMonitor(rsm.DEFAULT_CONFIG)
+    # Unconfirmed uplink, no FOpts, FPort 2, 22-byte payload, MIC
+    frame = bytes([0x40, 0x04, 0x03, 0x02, 0x01, 0x00, 0x01, 0x00, 0x02]) + bytes(22 + 4)
+    packets = [_packet(monitor, "QAAA" + "!" * 44),
+               _packet(monitor, base64.b64encode(frame).decode())]
+
+    monitor._process_batch(packets, np.zeros(0, dtype=np.uint32), show_all=False)
+
+    assert monitor.packet_count == 2
+    assert monitor.my_device_count == 1
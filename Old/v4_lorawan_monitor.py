@@ -5,13 +5,21 @@ Real-time LoRaWAN signal analysis and sensor data display
 Based on proven rak_signal_monitor.py but optimized for V4 22-byte packets
 """
 
-import base64
 import binascii
+import bisect
 import sys
 import json
-import re
+import struct
 import time
 from datetime import datetime
+from operator import truediv
+
+# orjson parses the rxpk bytes directly and faster when installed; its
+# JSONDecodeError subclasses json.JSONDecodeError, so handlers stay the same
+try:
+    from orjson import loads as _jloads
+except ImportError:
+    from json import loads as _jloads
 
 try:
     from Crypto.Cipher import AES
@@ -25,106 +33,172 @@ V4_CONFIG = {
     "dev_eui": "0102030405060708",
     "app_eui": "1112131415161718",
     "app_key": "21222324252627282A2B2C2D2E2F3031",
+    # AppSKey derived at OTAA join (hex); leave empty to fall back to AppKey ECB
+    "app_s_key": "",
     "device_name": "Sensorite V4 LoRaWAN"
 }
 
+# Gateway JSON is located on raw stdin bytes: from the first '{"rxpk":[' to the next ']}'
+_RXPK_OPEN = b'{"rxpk":['
+_RXPK_CLOSE = b']}'
+
+# V4 sensor payload (big endian): accel x/y/z | gyro x/y/z | mag x/y/z | ToF C, ToF D
+_SENSOR = struct.Struct(">9h2H")
+# Accelerometer scaled by 1000, gyroscope and magnetometer by 10
+_SENSOR_DIVISORS = (1000.0,) * 3 + (10.0,) * 6
+
+# LoRaWAN header through FPort: MHDR | DevAddr (raw) | FCtrl | FCnt (little endian) | FPort
+_HDR = struct.Struct("<B4sBHB")
+
+# Full V4 uplink: MHDR (1) + DevAddr (4) + FCtrl (1) + FCnt (2) + FPort (1) + payload (22) + MIC (4)
+_V4_FRAME_SIZE = 35
+
+# Batch mode: packets whose AES blocks go through one cipher call (two blocks each)
+_BATCH_SIZE = 256
+
+# Signal classification: a reading above the i-th cut gets label i + 1
+_RSSI_CUTS = (-120, -100, -80)
+_SNR_CUTS = (-10, 0, 5)
+_SIGNAL_LABELS = ("Poor", "Fair", "Good", "Excellent")
+_DISTANCE_CUTS = (-120, -100, -80, -50)
+_DISTANCE_LABELS = ("> 15km", "5km - 15km", "1km - 5km", "100m - 1km", "< 100m")
+
+# LoRaWAN encryption block A_i: 0x01 | 4 x 0x00 | Dir | DevAddr | FCnt | 0x00 | i
+_A_BLOCK = struct.Struct("<B4xB4sIxB")
+
+def _frm_payload_keystream(cipher, dev_addr_le, fcnt, length, direction=0):
+    """LoRaWAN CTR keystream: all A_i blocks encrypted in a single ECB call"""
+    blocks = b"".join(_A_BLOCK.pack(0x01, direction, dev_addr_le, fcnt, i)
+                      for i in range(1, (length + 15) // 16 + 1))
+    return cipher.encrypt(blocks)[:length]
+
+class _Packet:
+    """One rxpk entry; slots instead of a per-packet dict"""
+    __slots__ = ('timestamp', 'frequency', 'rssi', 'lsnr', 'datarate', 'size', 'data', 'channel',
+                 'lorawan', 'aes_out')
+
+    def __init__(self, timestamp, frequency, rssi, lsnr, datarate, size, data, channel):
+        self.timestamp = timestamp
+        self.frequency = frequency
+        self.rssi = rssi
+        self.lsnr = lsnr
+        self.datarate = datarate
+        self.size = size
+        self.data = data
+        self.channel = channel
+        self.lorawan = None  # parsed _Frame, cached by is_v4_device / batch mode
+        self.aes_out = None  # 32 bytes of AES output precomputed by batch mode
+
+class _Frame:
+    """Decoded LoRaWAN header of one uplink"""
+    __slots__ = ('mhdr', 'dev_addr_raw', 'fctrl', 'fcnt', 'fport', 'payload_start', 'payload_len',
+                 'packet_bytes')
+
+    def __init__(self, mhdr, dev_addr_raw, fctrl, fcnt, fport, payload_start, payload_len, packet_bytes):
+        self.mhdr = mhdr
+        self.dev_addr_raw = dev_addr_raw
+        self.fctrl = fctrl
+        self.fcnt = fcnt
+        self.fport = fport
+        self.payload_start = payload_start
+        self.payload_len = payload_len
+        self.packet_bytes = packet_bytes
+
 class V4LoRaWANMonitor:
     def __init__(self):
         self.packet_count = 0
         self.v4_device_count = 0
         self.start_time = datetime.now()
+        # (epoch second, "HH:MM:SS") of the last timestamp printed
+        self._ts_cache = (None, "")
+        # ECB keeps no state between calls, so one keyed cipher serves every packet
+        if CRYPTO_AVAILABLE:
+            self._cipher = AES.new(bytes.fromhex(V4_CONFIG["app_key"]), AES.MODE_ECB)
+        # Two-block ECB input: the 22-byte payload is copied in, the 10-byte tail stays zero
+        self._pad_buf = bytearray(32)
+        # With the session AppSKey, payloads are decrypted with real LoRaWAN AES-CTR
+        self._app_s_cipher = None
+        if CRYPTO_AVAILABLE and V4_CONFIG.get("app_s_key"):
+            self._app_s_cipher = AES.new(bytes.fromhex(V4_CONFIG["app_s_key"]), AES.MODE_ECB)
 
     def parse_lora_packet(self, line):
         """Extract LoRa packet information from gateway output"""
         try:
-            # Look for JSON data in the line
-            json_match = re.search(r'\{"rxpk":\[.*?\]\}', line)
-            if not json_match:
+            # Look for JSON data in the line (two memchr-backed scans, no regex)
+            start = line.find(_RXPK_OPEN)
+            if start < 0:
                 return None
+            end = line.find(_RXPK_CLOSE, start + len(_RXPK_OPEN))
+            if end < 0:
+                return None
+            json_text = line[start:end + len(_RXPK_CLOSE)]
 
-            packet_data = json.loads(json_match.group())
+            packet_data = _jloads(json_text)
             if 'rxpk' not in packet_data or not packet_data['rxpk']:
                 return None
 
             rxpk = packet_data['rxpk'][0]  # First packet
-            return {
-                'timestamp': rxpk.get('time', ''),
-                'frequency': rxpk.get('freq', 0),
-                'rssi': rxpk.get('rssi', 0),
-                'lsnr': rxpk.get('lsnr', 0),
-                'datarate': rxpk.get('datr', ''),
-                'size': rxpk.get('size', 0),
-                'data': rxpk.get('data', ''),
-                'channel': rxpk.get('chan', 0),
-                'raw_json': json_match.group()
-            }
-        except (json.JSONDecodeError, KeyError, IndexError):
+            return _Packet(rxpk.get('time', ''), rxpk.get('freq', 0), rxpk.get('rssi', 0),
+                           rxpk.get('lsnr', 0), rxpk.get('datr', ''), rxpk.get('size', 0),
+                           rxpk.get('data', ''), rxpk.get('chan', 0))
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, IndexError):
             return None
 
+    @staticmethod
+    def _fmt_devaddr(b):
+        """Display form of the raw DevAddr bytes"""
+        return b.hex().upper()
+
     def parse_lorawan_frame(self, data_b64):
         """Parse LoRaWAN frame structure"""
         try:
-            packet_bytes = base64.b64decode(data_b64)
+            packet_bytes = binascii.a2b_base64(data_b64)  # what b64decode calls, minus the wrapper
             if len(packet_bytes) < 12:  # Minimum LoRaWAN frame size
                 return None
 
-            # LoRaWAN frame structure:
-            # MHDR (1) | DevAddr (4) | FCtrl (1) | FCnt (2) | FPort (1) | FRMPayload | MIC (4)
-            mhdr = packet_bytes[0]
-            dev_addr = packet_bytes[1:5].hex().upper()
-            fctrl = packet_bytes[5]
-            fcnt = int.from_bytes(packet_bytes[6:8], 'little')
-
-            # Calculate payload start (skip MHDR + DevAddr + FCtrl + FCnt)
-            payload_start = 8
+            # Frames are at least 12 bytes, so FPort is always present at offset 8;
+            # DevAddr stays raw bytes and is formatted only when printed
+            mhdr, dev_addr_raw, fctrl, fcnt, fport = _HDR.unpack_from(packet_bytes)
+            payload_start = _HDR.size
+            payload_len = len(packet_bytes) - payload_start - 4  # excluding MIC
 
-            # Check for FPort (optional)
-            fport = None
-            if len(packet_bytes) > payload_start:
-                fport = packet_bytes[payload_start]
-                payload_start += 1
-
-            return {
-                'mhdr': mhdr,
-                'dev_addr': dev_addr,
-                'fctrl': fctrl,
-                'fcnt': fcnt,
-                'fport': fport,
-                'payload_start': payload_start,
-                'packet_bytes': packet_bytes
-            }
-        except:
+            return _Frame(mhdr, dev_addr_raw, fctrl, fcnt, fport, payload_start, payload_len, packet_bytes)
+        except (ValueError, TypeError):  # bad base64 (binascii.Error), non-ASCII str, or None
             return None
 
     def is_v4_device(self, packet_info):
         """Check if packet is from Sensorite V4 device using LoRaWAN signature"""
-        if not packet_info or not packet_info['data']:
+        if not packet_info or not packet_info.data:
+            return False
+        # When the gateway reports the frame size, other traffic is dropped before any decoding
+        size = packet_info.size
+        if size and size != _V4_FRAME_SIZE:
             return False
 
         try:
-            lorawan_info = self.parse_lorawan_frame(packet_info['data'])
+            lorawan_info = packet_info.lorawan or self.parse_lorawan_frame(packet_info.data)
             if not lorawan_info:
                 return False
 
             # V4 device signature (22-byte payload like V3 but different packet counter behavior)
-            packet_bytes = lorawan_info['packet_bytes']
-            fport = lorawan_info.get('fport')
-            payload_start = lorawan_info['payload_start']
+            fport = lorawan_info.fport
 
-            # Extract payload length (excluding MIC)
-            if len(packet_bytes) >= payload_start + 4:
-                payload_length = len(packet_bytes) - payload_start - 4
+            # Payload length (excluding MIC); negative when the frame has no room for one
+            payload_length = lorawan_info.payload_len
+            if payload_length >= 0:
 
                 # V4 LoRaWAN signature:
                 # - Exactly 22 bytes payload (same as V3)
                 # - Port 2 (configured in firmware)
                 # - Valid LoRaWAN structure
                 if payload_length == 22 and fport == 2:
-                    current_dev_addr = lorawan_info['dev_addr']
+                    current_dev_addr = self._fmt_devaddr(lorawan_info.dev_addr_raw)
                     print(f"[FILTER] ✓ MATCHED V4 device: DevAddr={current_dev_addr}, Payload={payload_length}B, Port={fport}")
+                    # Hand the parsed frame to decrypt_v4_payload so it is not decoded twice
+                    packet_info.lorawan = lorawan_info
                     return True
                 else:
-                    current_dev_addr = lorawan_info['dev_addr']
+                    current_dev_addr = self._fmt_devaddr(lorawan_info.dev_addr_raw)
                     print(f"[FILTER] Rejected: DevAddr={current_dev_addr}, Payload={payload_length}B, Port={fport} (expected 22B on port 2)")
                     return False
             return False
@@ -138,12 +212,12 @@ class V4LoRaWANMonitor:
             return {"error": "Crypto library not available", "success": False}
 
         try:
-            lorawan_info = self.parse_lorawan_frame(packet_info['data'])
+            lorawan_info = packet_info.lorawan or self.parse_lorawan_frame(packet_info.data)
             if not lorawan_info:
                 return {"error": "Invalid LoRaWAN frame", "success": False}
 
-            packet_bytes = lorawan_info['packet_bytes']
-            payload_start = lorawan_info['payload_start']
+            packet_bytes = lorawan_info.packet_bytes
+            payload_start = lorawan_info.payload_start
 
             # Extract encrypted payload (excluding MIC)
             if len(packet_bytes) < payload_start + 4:
@@ -154,35 +228,32 @@ class V4LoRaWANMonitor:
             if len(encrypted_payload) != 22:
                 return {"error": f"Invalid payload size: {len(encrypted_payload)} (expected 22)", "success": False}
 
-            # Decrypt payload using AppKey (same as V3)
-            app_key_bytes = bytes.fromhex(V4_CONFIG["app_key"])
-            cipher = AES.new(app_key_bytes, AES.MODE_ECB)
-
-            # Pad to 32 bytes for AES decryption
-            padded_data = encrypted_payload + b'\x00' * (32 - len(encrypted_payload))
-            decrypted = cipher.decrypt(padded_data)
+            # Batch mode has already run this packet's two AES blocks (see _process_batch)
+            aes_out = packet_info.aes_out
+            if self._app_s_cipher is not None:
+                # Real LoRaWAN: FRMPayload XOR the AES-CTR keystream (A_1, A_2) of the AppSKey
+                if aes_out:
+                    keystream = aes_out[:22]
+                else:
+                    keystream = _frm_payload_keystream(self._app_s_cipher, lorawan_info.dev_addr_raw,
+                                                       lorawan_info.fcnt, len(encrypted_payload))
+                decrypted = (int.from_bytes(encrypted_payload, 'big')
+                             ^ int.from_bytes(keystream, 'big')).to_bytes(len(encrypted_payload), 'big')
+            elif aes_out:
+                decrypted = aes_out
+            else:
+                # Decrypt payload using AppKey (same as V3)
+                # Pad to 32 bytes for AES decryption
+                self._pad_buf[:22] = encrypted_payload
+                decrypted = self._cipher.decrypt(self._pad_buf)
 
             # Parse V4 sensor data (22 bytes) - same format as V3
             sensor_data = {}
             if len(decrypted) >= 22:
-                # Accelerometer (6 bytes, scaled by 1000)
-                ax = int.from_bytes(decrypted[0:2], 'big', signed=True) / 1000.0
-                ay = int.from_bytes(decrypted[2:4], 'big', signed=True) / 1000.0
-                az = int.from_bytes(decrypted[4:6], 'big', signed=True) / 1000.0
-
-                # Gyroscope (6 bytes, scaled by 10)
-                gx = int.from_bytes(decrypted[6:8], 'big', signed=True) / 10.0
-                gy = int.from_bytes(decrypted[8:10], 'big', signed=True) / 10.0
-                gz = int.from_bytes(decrypted[10:12], 'big', signed=True) / 10.0
-
-                # Magnetometer (6 bytes, scaled by 10)
-                mx = int.from_bytes(decrypted[12:14], 'big', signed=True) / 10.0
-                my = int.from_bytes(decrypted[14:16], 'big', signed=True) / 10.0
-                mz = int.from_bytes(decrypted[16:18], 'big', signed=True) / 10.0
-
-                # ToF sensors (4 bytes)
-                tof_c_raw = int.from_bytes(decrypted[18:20], 'big')
-                tof_d_raw = int.from_bytes(decrypted[20:22], 'big')
+                values = _SENSOR.unpack_from(decrypted)
+                # All nine axis divisions in one C-level map; map stops before the ToF fields
+                ax, ay, az, gx, gy, gz, mx, my, mz = map(truediv, values, _SENSOR_DIVISORS)
+                tof_c_raw, tof_d_raw = values[9:]
 
                 tof_c_mm = tof_c_raw if tof_c_raw != 0xFFFF else None
                 tof_d_mm = tof_d_raw if tof_d_raw != 0xFFFF else None
@@ -212,28 +283,12 @@ class V4LoRaWANMonitor:
 
     def analyze_signal_quality(self, packet_info):
         """Analyze signal quality and provide feedback"""
-        rssi = packet_info['rssi']
-        lsnr = packet_info['lsnr']
-
-        # Signal strength analysis
-        if rssi > -80:
-            signal_quality = "Excellent"
-        elif rssi > -100:
-            signal_quality = "Good"
-        elif rssi > -120:
-            signal_quality = "Fair"
-        else:
-            signal_quality = "Poor"
-
-        # SNR analysis
-        if lsnr > 5:
-            snr_quality = "Excellent"
-        elif lsnr > 0:
-            snr_quality = "Good"
-        elif lsnr > -10:
-            snr_quality = "Fair"
-        else:
-            snr_quality = "Poor"
+        rssi = packet_info.rssi
+        lsnr = packet_info.lsnr
+
+        # bisect_left counts the cuts strictly below the reading
+        signal_quality = _SIGNAL_LABELS[bisect.bisect_left(_RSSI_CUTS, rssi)]
+        snr_quality = _SIGNAL_LABELS[bisect.bisect_left(_SNR_CUTS, lsnr)]
 
         return {
             "signal_quality": signal_quality,
@@ -243,64 +298,65 @@ class V4LoRaWANMonitor:
 
     def estimate_distance(self, rssi):
         """Rough distance estimation based on RSSI"""
-        if rssi > -50:
-            return "< 100m"
-        elif rssi > -80:
-            return "100m - 1km"
-        elif rssi > -100:
-            return "1km - 5km"
-        elif rssi > -120:
-            return "5km - 15km"
-        else:
-            return "> 15km"
+        return _DISTANCE_LABELS[bisect.bisect_left(_DISTANCE_CUTS, rssi)]
+
+    def _now_hms(self):
+        """Current time as HH:MM:SS, formatted at most once per second"""
+        now = int(time.time())
+        if now != self._ts_cache[0]:
+            self._ts_cache = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        return self._ts_cache[1]
 
     def print_packet_summary(self, packet_info, decrypt_result):
         """Print formatted packet information and sensor data"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = self._now_hms()
 
-        print(f"\n🎯 SENSORITE V4 LoRaWAN PACKET #{self.v4_device_count}")
-        print(f"⏰ Time: {timestamp}")
-        print(f"📶 RSSI: {packet_info['rssi']} dBm")
-        print(f"📊 SNR: {packet_info['lsnr']} dB")
-        print(f"📻 Freq: {packet_info['frequency']} MHz")
-        print(f"📏 Size: {packet_info['size']} bytes")
-        print(f"📡 Rate: {packet_info['datarate']}")
+        # Collect the block and emit it with one write instead of ~15 print() calls
+        L = [f"\n🎯 SENSORITE V4 LoRaWAN PACKET #{self.v4_device_count}"]
+        L.append(f"⏰ Time: {timestamp}")
+        L.append(f"📶 RSSI: {packet_info.rssi} dBm")
+        L.append(f"📊 SNR: {packet_info.lsnr} dB")
+        L.append(f"📻 Freq: {packet_info.frequency} MHz")
+        L.append(f"📏 Size: {packet_info.size} bytes")
+        L.append(f"📡 Rate: {packet_info.datarate}")
 
         # Signal quality analysis
         quality = self.analyze_signal_quality(packet_info)
-        print(f"🔍 Quality: {quality['signal_quality']} ({quality['distance_estimate']})")
+        L.append(f"🔍 Quality: {quality['signal_quality']} ({quality['distance_estimate']})")
 
         if decrypt_result.get('success'):
             lorawan_info = decrypt_result['lorawan_info']
-            print(f"🆔 DevAddr: {lorawan_info['dev_addr']}")
-            print(f"📊 FCnt: {lorawan_info['fcnt']}")
-            print(f"🚪 Port: {lorawan_info['fport']}")
+            L.append(f"🆔 DevAddr: {self._fmt_devaddr(lorawan_info.dev_addr_raw)}")
+            L.append(f"📊 FCnt: {lorawan_info.fcnt}")
+            L.append(f"🚪 Port: {lorawan_info.fport}")
 
             sensor_data = decrypt_result.get('sensor_data', {})
             if 'accelerometer' in sensor_data:
                 acc = sensor_data['accelerometer']
-                print(f"🏃 Accel [g]: X={acc['x']:.3f}, Y={acc['y']:.3f}, Z={acc['z']:.3f}")
+                L.append(f"🏃 Accel [g]: X={acc['x']:.3f}, Y={acc['y']:.3f}, Z={acc['z']:.3f}")
 
             if 'gyroscope' in sensor_data:
                 gyro = sensor_data['gyroscope']
-                print(f"🌀 Gyro [dps]: X={gyro['x']:.1f}, Y={gyro['y']:.1f}, Z={gyro['z']:.1f}")
+                L.append(f"🌀 Gyro [dps]: X={gyro['x']:.1f}, Y={gyro['y']:.1f}, Z={gyro['z']:.1f}")
 
             if 'magnetometer' in sensor_data:
                 mag = sensor_data['magnetometer']
-                print(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']:.1f}")
+                L.append(f"🧭 Mag [µT]: X={mag['x']:.1f}, Y={mag['y']:.1f}, Z={mag['z']:.1f}")
 
             if 'tof' in sensor_data:
                 tof = sensor_data['tof']
                 c_str = f"{tof['distance_c_mm']}mm" if tof['c_valid'] else "Out of Range"
                 d_str = f"{tof['distance_d_mm']}mm" if tof['d_valid'] else "Out of Range"
-                print(f"📏 ToF C: {c_str}, ToF D: {d_str}")
+                L.append(f"📏 ToF C: {c_str}, ToF D: {d_str}")
 
-            print(f"🔒 Encrypted: {decrypt_result['encrypted_hex'][:32]}...")
-            print(f"🔓 Decrypted: {decrypt_result['decrypted_hex'][:32]}...")
+            L.append(f"🔒 Encrypted: {decrypt_result['encrypted_hex'][:32]}...")
+            L.append(f"🔓 Decrypted: {decrypt_result['decrypted_hex'][:32]}...")
         else:
-            print(f"❌ Decryption failed: {decrypt_result.get('error', 'Unknown')}")
+            L.append(f"❌ Decryption failed: {decrypt_result.get('error', 'Unknown')}")
 
-        print("-" * 60)
+        L.append("-" * 60)
+        # Looked up per call so a reassigned or redirected sys.stdout is honoured, as print() does
+        sys.stdout.write("\n".join(L) + "\n")
 
     def print_statistics(self):
         """Print session statistics"""
@@ -326,38 +382,88 @@ class V4LoRaWANMonitor:
         print("📡 Press Ctrl+C to stop")
         print("=" * 60)
 
+        # Lines stay bytes: parse_lora_packet filters them before anything is decoded
         try:
-            while True:
-                try:
-                    line = input()
-                    packet_info = self.parse_lora_packet(line)
-
-                    if packet_info:
-                        self.packet_count += 1
-                        is_v4 = self.is_v4_device(packet_info)
-
-                        if is_v4:
-                            self.v4_device_count += 1
-                            decrypt_result = self.decrypt_v4_payload(packet_info)
-                            self.print_packet_summary(packet_info, decrypt_result)
-                        elif show_all:
-                            timestamp = datetime.now().strftime("%H:%M:%S")
-                            print(f"[{timestamp}] #{self.packet_count} Other device: "
-                                  f"RSSI={packet_info['rssi']}dBm, "
-                                  f"Size={packet_info['size']}B, "
-                                  f"Freq={packet_info['frequency']}MHz")
-
-                except EOFError:
-                    break
+            for line in iter(sys.stdin.buffer.readline, b''):
+                packet_info = self.parse_lora_packet(line)
+
+                if packet_info:
+                    self.handle_packet(packet_info, show_all)
 
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user")
         finally:
             self.print_statistics()
 
+    def handle_packet(self, packet_info, show_all=False):
+        """Count, filter, decrypt and report one parsed packet"""
+        self.packet_count += 1
+        is_v4 = self.is_v4_device(packet_info)
+
+        if is_v4:
+            self.v4_device_count += 1
+            decrypt_result = self.decrypt_v4_payload(packet_info)
+            self.print_packet_summary(packet_info, decrypt_result)
+        elif show_all:
+            timestamp = self._now_hms()
+            print(f"[{timestamp}] #{self.packet_count} Other device: "
+                  f"RSSI={packet_info.rssi}dBm, "
+                  f"Size={packet_info.size}B, "
+                  f"Freq={packet_info.frequency}MHz")
+
+    def batch(self, stream, show_all=False):
+        """Process a captured gateway log, running AES for _BATCH_SIZE packets in one call"""
+        pending = []
+        for line in stream:
+            packet_info = self.parse_lora_packet(line)
+            if packet_info:
+                pending.append(packet_info)
+                if len(pending) == _BATCH_SIZE:
+                    self._process_batch(pending, show_all)
+                    pending = []
+        if pending:
+            self._process_batch(pending, show_all)
+        self.print_statistics()
+
+    def _process_batch(self, packets, show_all):
+        """Run the AES blocks of all V4-shaped frames at once, then report in input order"""
+        staged = []
+        blocks = []
+        for packet_info in packets:
+            size = packet_info.size
+            if not packet_info.data or (size and size != _V4_FRAME_SIZE):
+                continue
+            lorawan_info = self.parse_lorawan_frame(packet_info.data)
+            if not lorawan_info or lorawan_info.payload_len != 22 or lorawan_info.fport != 2:
+                continue
+            packet_info.lorawan = lorawan_info
+            if self._app_s_cipher is not None:
+                blocks.append(_A_BLOCK.pack(0x01, 0, lorawan_info.dev_addr_raw, lorawan_info.fcnt, 1))
+                blocks.append(_A_BLOCK.pack(0x01, 0, lorawan_info.dev_addr_raw, lorawan_info.fcnt, 2))
+            else:
+                start = lorawan_info.payload_start
+                blocks.append(lorawan_info.packet_bytes[start:start + 22] + b'\x00' * 10)
+            staged.append(packet_info)
+
+        if staged and CRYPTO_AVAILABLE:
+            if self._app_s_cipher is not None:
+                out = self._app_s_cipher.encrypt(b"".join(blocks))
+            else:
+                out = self._cipher.decrypt(b"".join(blocks))
+            for i, packet_info in enumerate(staged):
+                packet_info.aes_out = out[i * 32:i * 32 + 32]
+
+        for packet_info in packets:
+            self.handle_packet(packet_info, show_all)
+
 def main():
     if len(sys.argv) > 1:
-        if sys.argv[1] == "all":
+        if sys.argv[1] == "batch":
+            # Offline processing of a captured log: python3 v4_lorawan_monitor.py batch [all] < capture.log
+            monitor = V4LoRaWANMonitor()
+            monitor.batch(sys.stdin.buffer, show_all=sys.argv[2:3] == ["all"])
+            return
+        elif sys.argv[1] == "all":
             # Monitor all devices
             monitor = V4LoRaWANMonitor()
             monitor.monitor(show_all=True)